@@ -3,24 +3,55 @@
 # This file defines the PaperlessConfigHandler class.
 # It does NOT re-read config.ini; it expects a Config instance.
 
+from config.parser import parse_csv_tags
+
+# Marks a cached value that has not been read yet (None is a valid value)
+_UNSET = object()
+
+
 class PaperlessConfigHandler:
+    __slots__ = ('main_config', '_invoice_tags', '_receipt_tags', '_api_url', '_api_token')
+
     def __init__(self, main_config_instance):
         # The main_config_instance is an instance of the Config class
         # defined in config/settings.py
         self.main_config = main_config_instance
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the cached values from the main config (call after a reload)."""
+        self._invoice_tags = self._parse_tags('invoice_tags')
+        self._receipt_tags = self._parse_tags('receipt_tags')
+        # The API settings are re-read lazily on next access
+        self._api_url = _UNSET
+        self._api_token = _UNSET
+
+    def _parse_tags(self, key):
+        # Assuming tags are comma-separated strings in config.ini
+        tags_string = self.main_config.get('paperless', key, '')
+        return parse_csv_tags(tags_string)
+
+    @property
+    def api_url(self):
+        if self._api_url is _UNSET:
+            self._api_url = self.main_config.get('paperless', 'api_url')
+        return self._api_url
+
+    @property
+    def api_token(self):
+        if self._api_token is _UNSET:
+            self._api_token = self.main_config.get('paperless', 'api_token')
+        return self._api_token
 
     def get_api_url(self):
-        return self.main_config.get('paperless', 'api_url')
+        return self.api_url
 
     def get_api_token(self):
-        return self.main_config.get('paperless', 'api_token')
+        return self.api_token
 
+    # The tags are cached as tuples; callers get their own list, as before
     def get_invoice_tags(self):
-        # Assuming tags are comma-separated strings in config.ini
-        tags_string = self.main_config.get('paperless', 'invoice_tags', '')
-        return [tag.strip() for tag in tags_string.split(',') if tag.strip()]
+        return list(self._invoice_tags)
 
     def get_receipt_tags(self):
-        # Assuming tags are comma-separated strings in config.ini
-        tags_string = self.main_config.get('paperless', 'receipt_tags', '')
-        return [tag.strip() for tag in tags_string.split(',') if tag.strip()]
+        return list(self._receipt_tags)
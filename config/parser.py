@@ -0,0 +1,178 @@
+# config/parser.py
+"""
+Lightweight INI parser for config.ini
+
+config.ini is a flat list of [section] headers and key = value lines without
+interpolation, so two compiled regexes are enough to parse it. Anything more
+elaborate is handed to the standard configparser.
+"""
+
+import configparser
+import re
+import sys
+
+SECTION_RE = re.compile(r'^\[([^\]\n]+)\][ \t\r]*$', re.M)
+KV_RE = re.compile(r'^[ \t]*([^=;#\s\[][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
+
+# Lines that are neither blank nor comments
+_CONTENT_LINE_RE = re.compile(r'^[ \t]*[^\s;#]', re.M)
+
+# Syntax only configparser understands: interpolation, continuation lines,
+# ':' delimiters and the DEFAULT section
+_FULL_PARSER_RE = re.compile(r'%|^[ \t]+[^\s;#]|^[^=\[\n;#]*:|^\[DEFAULT\]', re.M)
+
+# Comma plus surrounding whitespace, so one split both separates and trims items
+_TAG_SPLIT_RE = re.compile(r'\s*,\s*')
+
+_UNSET = object()
+
+
+def parse_csv_tags(s):
+    """
+    Split a comma-separated setting such as 'Invoice, ProcessedByMiddleware'
+    into a tuple of trimmed, non-empty, interned items
+    """
+    return tuple(sys.intern(tag) for tag in _TAG_SPLIT_RE.split(s.strip()) if tag)
+
+
+class FastConfigParser:
+    """
+    Regex-based replacement for configparser.ConfigParser
+    Exposes the subset of the ConfigParser API used by Config
+    """
+
+    BOOLEAN_STATES = configparser.ConfigParser.BOOLEAN_STATES
+
+    def __init__(self):
+        self._sections = {}
+
+    @staticmethod
+    def _parse(text):
+        """Parse INI text into nested dicts, or return None if it needs configparser"""
+        if _FULL_PARSER_RE.search(text):
+            return None
+
+        parts = SECTION_RE.split(text)
+        if _CONTENT_LINE_RE.search(parts[0]):
+            return None  # Keys before the first section header
+
+        sections = {}
+        for name, body in zip(parts[1::2], parts[2::2]):
+            pairs = KV_RE.findall(body)
+            if name in sections or len(pairs) != len(_CONTENT_LINE_RE.findall(body)):
+                return None
+            section = {key.lower(): value for key, value in pairs}
+            if len(section) != len(pairs):
+                return None  # Duplicate keys
+            sections[name] = section
+        return sections
+
+    def sections(self):
+        return list(self._sections)
+
+    def has_section(self, section):
+        return section in self._sections
+
+    def add_section(self, section):
+        if section in self._sections:
+            raise configparser.DuplicateSectionError(section)
+        self._sections[section] = {}
+
+    def has_option(self, section, option):
+        return option.lower() in self._sections.get(section, ())
+
+    def options(self, section):
+        return list(self._section(section))
+
+    def items(self, section):
+        return list(self._section(section).items())
+
+    def get(self, section, option, *, fallback=_UNSET):
+        try:
+            return self._section(section)[option.lower()]
+        except KeyError:
+            if fallback is _UNSET:
+                raise configparser.NoOptionError(option, section) from None
+            return fallback
+        except configparser.NoSectionError:
+            if fallback is _UNSET:
+                raise
+            return fallback
+
+    def getint(self, section, option, *, fallback=_UNSET):
+        return self._get_converted(section, option, int, fallback)
+
+    def getfloat(self, section, option, *, fallback=_UNSET):
+        return self._get_converted(section, option, float, fallback)
+
+    def getboolean(self, section, option, *, fallback=_UNSET):
+        return self._get_converted(section, option, self._convert_to_boolean, fallback)
+
+    def set(self, section, option, value):
+        self._section(section)[option.lower()] = value
+
+    def remove_section(self, section):
+        return self._sections.pop(section, None) is not None
+
+    def read_dict(self, dictionary):
+        for section, keys in dictionary.items():
+            target = self._sections.setdefault(str(section), {})
+            for key, value in keys.items():
+                target[str(key).lower()] = str(value)
+
+    def write(self, fp):
+        for section, keys in self._sections.items():
+            fp.write(f"[{section}]\n")
+            for key, value in keys.items():
+                value = str(value).replace('\n', '\n\t')
+                fp.write(f"{key} = {value}\n")
+            fp.write("\n")
+
+    def __getitem__(self, section):
+        return self._section(section)
+
+    def __setitem__(self, section, keys):
+        self._sections[section] = {}
+        self.read_dict({section: keys})
+
+    def __contains__(self, section):
+        return section in self._sections
+
+    def _section(self, section):
+        try:
+            return self._sections[section]
+        except KeyError:
+            raise configparser.NoSectionError(section) from None
+
+    def _get_converted(self, section, option, conv, fallback):
+        try:
+            value = self.get(section, option)
+        except (configparser.NoSectionError, configparser.NoOptionError):
+            if fallback is _UNSET:
+                raise
+            return fallback
+        return conv(value)
+
+    def _convert_to_boolean(self, value):
+        if value.lower() not in self.BOOLEAN_STATES:
+            raise ValueError(f'Not a boolean: {value}')
+        return self.BOOLEAN_STATES[value.lower()]
+
+
+def parse_config(text, source='<string>'):
+    """
+    Parse config.ini contents
+
+    Returns a FastConfigParser for plain files, or a configparser.ConfigParser
+    when the text uses interpolation, continuation lines or other syntax
+    the fast path does not handle.
+    """
+    sections = FastConfigParser._parse(text)
+    if sections is None:
+        parser = configparser.ConfigParser()
+        parser.read_string(text, source=source)
+        return parser
+
+    parser = FastConfigParser()
+    parser._sections = sections
+    return parser
@@ -1,49 +1,36 @@
 # config/settings.py
 
-import os
 import configparser
-from pathlib import Path
-# Import the PaperlessConfigHandler from the new module
-# Ensure config/paperless/__init__.py exists (can be an empty file)
-# for config.paperless to be treated as a package.
-from config.paperless.settings import PaperlessConfigHandler # Correct import path assuming it's a class in that file
+import mmap
+import os
+import threading
+from config.parser import FastConfigParser, parse_config, parse_csv_tags
 
 class Config:
-    def __init__(self, config_file='config/config.ini'):
-        self.config = configparser.ConfigParser()
-        self.config_file = config_file
-        self.load_config()
-        # Initialize the PaperlessConfigHandler instance, passing this Config instance
-        # so it can access the loaded configparser object
-        self.paperless_config_handler = PaperlessConfigHandler(self)
+    __slots__ = (
+        'config', 'config_file', '_flat', '_flat_int', '_flat_bool', '_parsed',
+        '_config_dir_created', '_paperless_config_handler',
+        '_file_stamp',
+    )
 
-    def load_config(self):
-        if os.path.exists(self.config_file):
-            self.config.read(self.config_file)
-        else:
-            self._create_default_config()
+    DEFAULT_CONFIG_FILE = 'config/config.ini'
 
-    def _create_default_config(self):
-        """
-        Creates a default config.ini file with predefined settings.
-        This method is called if config.ini does not exist on startup.
-        """
-        self.config['database'] = {
+    # Settings written to a fresh config.ini by _create_default_config()
+    _DEFAULTS = {
+        'database': {
             'type': 'sqlite',
             'path': 'data/middleware.db'
-        }
-        
+        },
         # --- EXTENDED MODE SECTION ---
-        self.config['extended'] = {
+        'extended': {
             'enabled': 'false'
-        }
-        
-        self.config['ocr'] = {
+        },
+        'ocr': {
             'language': 'eng',
             'confidence_threshold': '60',
             'dpi': '300'
-        }
-        self.config['processing'] = {
+        },
+        'processing': {
             'upload_folder': 'uploads',
             'max_file_size': '10485760',
             'allowed_extensions': 'pdf,png,jpg,jpeg,tiff',
@@ -51,55 +38,190 @@ class Config:
             'check_interval_seconds': '10',
             'log_level': 'INFO',
             'processed_tag': 'ProcessedByMiddleware',
-            'error_tag': 'ErrorProcessing'
-        }
-        self.config['web_interface'] = {
+            'error_tag': 'ErrorProcessing',
+            # Mark documents 'processing' while their text is extracted
+            'publish_intermediate_state': 'false',
+            # PDF text layer order: 'blocks' (reading order) or 'text'
+            'pdf_text_mode': 'blocks',
+            # Text-layer characters below which a PDF page is OCRed as a scan
+            'pdf_ocr_min_chars': '1'
+        },
+        'web_interface': {
             'host': '0.0.0.0',
             'port': '5000',
             'debug': 'false',
             'secret_key': 'dev-secret-key-change-in-production'
-        }
-        self.config['logging'] = {
+        },
+        'logging': {
             'level': 'INFO',
             'file': 'logs/middleware.log'
-        }
-        self.config['currency'] = {
+        },
+        'currency': {
             'default': 'USD',
             'supported': 'USD,EUR,GBP,AUD,CAD'
-        }
+        },
         # --- PAPERLESS-NGX SECTION ---
-        self.config['paperless'] = {
+        'paperless': {
             'api_url': 'http://paperless-ngx:8000/api/',
             'api_token': 'YOUR_GENERATED_API_TOKEN', # Placeholder for default creation
             'invoice_tags': 'Invoice,ProcessedByMiddleware',
             'receipt_tags': 'Receipt,ProcessedByMiddleware'
-        }
+        },
         # --- BIGCAPITAL SECTION ---
-        self.config['bigcapital'] = {
+        'bigcapital': {
             'api_url': 'http://bigcapital:3000/api/',
             'api_token': 'YOUR_BIGCAPITAL_API_TOKEN',
             # Set the default due days to 7
             'default_due_days': '7',
             'auto_create_customers': 'false'
-        }
-        # Ensure the directory for config_file exists before writing
-        config_dir = os.path.dirname(self.config_file)
-        os.makedirs(config_dir, exist_ok=True)
-        
-        with open(self.config_file, 'w') as f:
-            self.config.write(f)
+        },
+    }
+
+    # Comma-separated settings that are pre-split at load time, see get_set()
+    _LIST_KEYS = (
+        ('currency', 'supported'),
+        ('processing', 'allowed_extensions'),
+        ('paperless', 'invoice_tags'),
+        ('paperless', 'receipt_tags'),
+    )
+
+    # One shared Config per config file, see Config.instance()
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, config_file=DEFAULT_CONFIG_FILE):
+        self.config = FastConfigParser()
+        self.config_file = config_file
+        # Set once config_file's directory is known to exist, see _write()
+        self._config_dir_created = False
+        # Created on first use, see paperless_config_handler
+        self._paperless_config_handler = None
+        # (mtime_ns, size) of config_file as last read or written, see load_config()
+        self._file_stamp = None
+        self.load_config()
+
+    @classmethod
+    def instance(cls, config_file=None):
+        """
+        Return the shared Config for config_file, parsing it only on first use.
+        Prefer this over Config() anywhere that may run more than once per process.
+        """
+        key = os.path.abspath(config_file or cls.DEFAULT_CONFIG_FILE)
+        config = cls._instances.get(key)
+        if config is None:
+            with cls._instances_lock:
+                config = cls._instances.get(key)
+                if config is None:
+                    config = cls._instances[key] = cls(key)
+        return config
+
+    def reload(self):
+        """Re-read config.ini and rebuild cached values if the file has changed."""
+        self.load_config()
+
+    def load_config(self):
+        # Opening directly doubles as the existence check
+        try:
+            text = self._read_config_file()
+        except FileNotFoundError:
+            self._create_default_config()
+        else:
+            if text is None:
+                return  # Unchanged since the last read or write
+            self.config = parse_config(text, self.config_file)
+            self._config_dir_created = True
+        self._post_load()
+        # Rebuild the handler's cached tag lists when the config is (re)loaded
+        self._refresh_paperless_handler()
+
+    def _post_load(self):
+        """
+        Build the lookup caches for the loaded config: a flat (section, key)
+        -> value dict, memoized int/bool conversions and the comma-separated
+        settings pre-split into frozensets of interned tokens.
+        """
+        self._flat = {}
+        for section in self.config.sections():
+            for key in self.config.options(section):
+                try:
+                    self._flat[(section, key)] = self.config.get(section, key)
+                except configparser.InterpolationError:
+                    # Left out of the cache, so only a get() of this key raises
+                    pass
+        self._flat_int = {}
+        self._flat_bool = {}
+        self._parsed = {}
+        for section, key in self._LIST_KEYS:
+            value = self._flat.get((section, key))
+            if value is not None:
+                self._parsed[f'{section}.{key}'] = self._split_list(value)
+
+    @staticmethod
+    def _split_list(value):
+        return frozenset(parse_csv_tags(value))
+
+    def _read_config_file(self):
+        """
+        Read config.ini through a read-only mmap and decode it in one step.
+        Returns None if the file's mtime and size match the last read or write.
+        """
+        fd = os.open(self.config_file, os.O_RDONLY)
+        try:
+            stat = os.fstat(fd)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._file_stamp:
+                return None
+            self._file_stamp = stamp
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            if stat.st_size == 0:
+                return ''  # mmap cannot map an empty file
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, 'utf-8')
+        finally:
+            os.close(fd)
+
+    def _create_default_config(self):
+        """
+        Creates a default config.ini file with predefined settings.
+        This method is called if config.ini does not exist on startup.
+        """
+        self.config.read_dict(self._DEFAULTS)
+        self._write()
 
     def get(self, section, key, fallback=None):
         """Get a configuration value."""
-        return self.config.get(section, key, fallback=fallback)
+        try:
+            return self._flat[(section, key)]
+        except KeyError:
+            # Misses go to the parser, which also handles mixed-case keys
+            return self.config.get(section, key, fallback=fallback)
 
     def getint(self, section, key, fallback=None):
         """Get an integer configuration value."""
-        return self.config.getint(section, key, fallback=fallback)
+        return self._get_converted(self._flat_int, self.config.getint, section, key, fallback)
 
     def getboolean(self, section, key, fallback=None):
         """Get a boolean configuration value."""
-        return self.config.getboolean(section, key, fallback=fallback)
+        return self._get_converted(self._flat_bool, self.config.getboolean, section, key, fallback)
+
+    def _get_converted(self, cache, getter, section, key, fallback):
+        try:
+            return cache[(section, key)]
+        except KeyError:
+            pass
+        value = getter(section, key, fallback=fallback)
+        # Only memoize values that came from the file, never the fallback
+        if (section, key) in self._flat:
+            cache[(section, key)] = value
+        return value
+
+    def get_set(self, section, key, fallback=''):
+        """Get a comma-separated configuration value as a frozenset."""
+        parsed = self._parsed.get(f'{section}.{key}')
+        if parsed is None:
+            parsed = self._split_list(self.get(section, key, fallback) or '')
+        return parsed
 
     def set(self, section, key, value):
         """Set a configuration value."""
@@ -109,16 +231,49 @@ class Config:
         
         # Set the value
         self.config.set(section, key, str(value))
+        self._post_load()
+        # Unsaved changes: make the next reload() read the file again
+        self._file_stamp = None
+
+        # Keep the handler's cached Paperless values in sync
+        if section == 'paperless':
+            self._refresh_paperless_handler()
 
     def save(self):
         """Save configuration changes to file."""
-        # Ensure the directory exists
-        config_dir = os.path.dirname(self.config_file)
-        os.makedirs(config_dir, exist_ok=True)
-        
-        # Write the configuration to file
-        with open(self.config_file, 'w') as f:
+        self._write()
+
+    def _write(self):
+        """Write the current configuration to config_file."""
+        # Ensure the directory for config_file exists before the first write
+        if not self._config_dir_created:
+            config_dir = os.path.dirname(self.config_file)
+            if config_dir:
+                os.makedirs(config_dir, exist_ok=True)
+            self._config_dir_created = True
+
+        # Write to a temporary file and rename it over config_file so a crash
+        # mid-write never leaves a truncated config.ini behind
+        tmp_file = self.config_file + '.tmp'
+        with open(tmp_file, 'w') as f:
             self.config.write(f)
+        os.replace(tmp_file, self.config_file)
+        stat = os.stat(self.config_file)
+        self._file_stamp = (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def paperless_config_handler(self):
+        """PaperlessConfigHandler for this config, created on first use."""
+        if self._paperless_config_handler is None:
+            # Imported here so config.paperless is only loaded when Paperless settings are used
+            from config.paperless.settings import PaperlessConfigHandler
+            self._paperless_config_handler = PaperlessConfigHandler(self)
+        return self._paperless_config_handler
+
+    def _refresh_paperless_handler(self):
+        # Only refresh a handler that has already been created
+        if self._paperless_config_handler is not None:
+            self._paperless_config_handler.refresh()
 
     # Add specific getters for Paperless-ngx settings, delegating to the handler
     def get_paperless_api_url(self):
@@ -4,6 +4,6 @@ Core modules for simplified-paperless-bigcapital-middleware
 """
 
 from .ocr_processor import OCRProcessor, extract_text_from_file
-from .text_extractor import InvoiceDataExtractor, extract_invoice_data
+from .text_extractor import InvoiceDataExtractor, InvoiceRecord, extract_invoice_data
 
-__all__ = ['OCRProcessor', 'extract_text_from_file', 'InvoiceDataExtractor', 'extract_invoice_data']
+__all__ = ['OCRProcessor', 'extract_text_from_file', 'InvoiceDataExtractor', 'InvoiceRecord', 'extract_invoice_data']
@@ -1,12 +1,31 @@
 # core/processor.py
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ocr_processor import OCRProcessor
+from .text_extractor import InvoiceDataExtractor, to_json
+
+
 class Processor:
     """
     Main class for orchestrating document processing workflow.
     """
-    def __init__(self):
-        # Initialize any necessary components (e.g., OCRProcessor, TextExtractor)
-        pass
+    def __init__(self, ocr_processor: Optional[OCRProcessor] = None, db_manager=None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            ocr_processor: OCR processor to use; a default one is created on first use
+            db_manager: DatabaseManager that process_documents() stores results with
+            max_workers: Documents OCRed at once by process_documents()
+        """
+        self.ocr_processor = ocr_processor
+        self.db_manager = db_manager
+        self.max_workers = max_workers
+        self.extractor = InvoiceDataExtractor()
 
     def is_valid_file_type(self, file_type):
         """Checks if the given file type is supported."""
@@ -48,3 +67,83 @@ class Processor:
             'ocr_text': 'MOCKED OCR TEXT',
             'processing_time': 1.0
         }
+
+    def process_documents(self, file_paths: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Process several documents as a pipeline.
+
+        OCR runs on a thread pool (tesseract works in its own processes, so the
+        threads mostly wait on it) and each document's invoice data is
+        extracted as soon as its text is ready, overlapping the OCR of the
+        rest. With a db_manager, the processed documents are then stored with
+        one batched insert.
+
+        Args:
+            file_paths: (file_path, file_type) pairs
+
+        Returns:
+            One result per document, in input order, shaped like
+            process_document(); stored documents also carry 'document_id'
+        """
+        if self.ocr_processor is None:
+            self.ocr_processor = OCRProcessor()
+        timestamp = datetime.utcnow().isoformat()
+        results = [None] * len(file_paths)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for position, (file_path, file_type) in enumerate(file_paths):
+                if self.is_valid_file_type(file_type):
+                    futures[pool.submit(self._timed_ocr, file_path)] = position
+                else:
+                    results[position] = {'success': False, 'error': 'Unsupported file type'}
+
+            for future in as_completed(futures):
+                position = futures[future]
+                try:
+                    ocr_text, ocr_time = future.result()
+                except Exception as e:
+                    results[position] = {'success': False, 'error': str(e), 'error_type': type(e).__name__}
+                    continue
+
+                start_time = time.perf_counter()
+                data = self.extractor.extract_invoice_data(ocr_text, timestamp)
+                processing_time = ocr_time + time.perf_counter() - start_time
+                if data.get('error'):
+                    results[position] = {'success': False, 'error': data['error'],
+                                         'ocr_text': ocr_text, 'processing_time': processing_time}
+                else:
+                    results[position] = {'success': True, 'data': data,
+                                         'ocr_text': ocr_text, 'processing_time': processing_time}
+
+        if self.db_manager is not None:
+            self._store_results(file_paths, results, timestamp)
+        return results
+
+    def _timed_ocr(self, file_path: str) -> Tuple[str, float]:
+        """OCR one file, returning its text and the seconds it took"""
+        start_time = time.perf_counter()
+        text = self.ocr_processor.extract_text(file_path)
+        return text, time.perf_counter() - start_time
+
+    def _store_results(self, file_paths: List[Tuple[str, str]], results: List[Dict[str, Any]],
+                       timestamp: str):
+        """Store every successful result in one transaction and record its document ID"""
+        stored = [position for position, result in enumerate(results) if result['success']]
+        rows = []
+        for position in stored:
+            file_path = file_paths[position][0]
+            data = results[position]['data']
+            rows.append({
+                'filename': os.path.basename(file_path),
+                'file_path': file_path,
+                'file_size': os.path.getsize(file_path),
+                'processed_date': timestamp,
+                'status': 'completed',
+                'ocr_text': results[position]['ocr_text'],
+                'extracted_data': to_json(data),
+                'amount': data.get('total_amount'),
+            })
+
+        for position, document_id in zip(stored, self.db_manager.store_documents(rows)):
+            results[position]['document_id'] = document_id
@@ -0,0 +1,96 @@
+# core/tesseract_engine.py
+"""
+Tesseract helpers shared by OCRProcessor and DocumentProcessor
+Single images go through TesseractEngine; batched runs hand tesseract a list
+file of images and split its output back into pages.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+# Try to import OCR libraries (they might not be installed)
+try:
+    import pytesseract
+    from PIL import Image
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+# Optional in-process Tesseract binding; keeps the engine and language data
+# loaded between images instead of spawning a tesseract process per call
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+
+def to_grayscale(image: 'Image.Image') -> 'Image.Image':
+    """Return image as a single channel; Tesseract would convert it to grayscale anyway"""
+    return image if image.mode == 'L' else image.convert('L')
+
+
+def write_image_list(list_file: str, image_paths: List[str]) -> str:
+    """Write image paths to a list file, which tesseract reads as one multi-page input"""
+    with open(list_file, 'w') as f:
+        f.write('\n'.join(image_paths) + '\n')
+    return list_file
+
+
+def split_pages(text: str) -> List[str]:
+    """Split a multi-page tesseract output, where each page ends with a form feed, into page texts"""
+    pages = text.split('\f')
+    if len(pages) > 1 and not pages[-1].strip():
+        pages.pop()
+    return [page.strip() for page in pages]
+
+
+class TesseractEngine:
+    """
+    OCR of PIL images, in-process through tesserocr when it is installed and
+    through pytesseract otherwise
+    """
+
+    def __init__(self, language: Optional[str] = None, psm: Optional[int] = None):
+        """
+        Args:
+            language: Tesseract language code; tesseract's default when None
+            psm: Page segmentation mode; tesseract's default when None
+        """
+        self.language = language
+        self.psm = psm
+        # Resident tesserocr API, created on first use
+        self._api = None
+        self._api_lock = threading.Lock()
+
+    def image_to_string(self, image: 'Image.Image') -> str:
+        """OCR one image and return tesseract's text as is"""
+        image = to_grayscale(image)
+        if TESSEROCR_AVAILABLE:
+            # TessBaseAPI is not thread-safe; one image at a time per engine
+            with self._api_lock:
+                if self._api is None:
+                    self._api = tesserocr.PyTessBaseAPI(**self._options(psm_key='psm'))
+                self._api.SetImage(image)
+                return self._api.GetUTF8Text()
+        return pytesseract.image_to_string(image, **self._options())
+
+    def list_to_string(self, list_file: str) -> str:
+        """OCR every image named in a list file (see write_image_list) with one tesseract run"""
+        return pytesseract.image_to_string(list_file, **self._options())
+
+    def close(self):
+        """Release the tesserocr API, if started"""
+        with self._api_lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+
+    def _options(self, psm_key: str = 'config') -> Dict[str, Any]:
+        """Keyword arguments for tesserocr (psm_key='psm') or pytesseract"""
+        options = {}
+        if self.language:
+            options['lang'] = self.language
+        if self.psm is not None:
+            options[psm_key] = self.psm if psm_key == 'psm' else f'--psm {self.psm}'
+        return options
@@ -4,203 +4,423 @@ Text extraction and invoice data processing for simplified-paperless-bigcapital-
 Handles extraction of structured data from invoices and documents
 """
 
+import calendar
+import copy
 import logging
 import re
+import threading
+from dataclasses import dataclass, field, fields as dataclass_fields
+from functools import lru_cache
+from itertools import islice
 from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime
+from datetime import date, datetime, MINYEAR
 from decimal import Decimal, InvalidOperation
 import json
 
+# Optional faster JSON encoder for storing extraction results
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional linear-time regex engine (no backtracking); used for the patterns it
+# can express, i.e. those without lookarounds or backreferences
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Optional Hyperscan engine; matches every field and currency pattern in one
+# vectorized pass over the text
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+
+def _compile_all(patterns: List[str], flags: int = re.IGNORECASE) -> Tuple[re.Pattern, ...]:
+    return tuple(re.compile(pattern, flags) for pattern in patterns)
+
+
+def _compile_linear(pattern: str):
+    """Compile a pattern with re2 when installed, else with re; flags go inline"""
+    if RE2_AVAILABLE:
+        return re2.compile(pattern)
+    return re.compile(pattern)
+
+
+# Patterns are compiled once at import; all field patterns are case-insensitive
+_CURRENCY_PATTERNS = {
+    'USD': _compile_all([r'\$', r'USD', r'US\$']),
+    'EUR': _compile_all([r'€', r'EUR', r'EURO']),
+    'GBP': _compile_all([r'£', r'GBP', r'POUND']),
+    'AUD': _compile_all([r'A\$', r'AUD', r'AU\$']),
+}
+
+# Each currency's patterns as one named group, for the field scan in _FIELD_RE.
+# Each alternative sits in a lookahead there, so overlapping hits (the '$' in
+# 'A$') are still seen; the earliest currency in _CURRENCY_PATTERNS wins, not
+# the earliest match in the text.
+_CURRENCY_PRIORITY = {currency: rank for rank, currency in enumerate(_CURRENCY_PATTERNS)}
+_CURRENCY_ALTERNATIVES = [
+    f'(?P<{currency}>' + '|'.join(p.pattern for p in patterns) + ')'
+    for currency, patterns in _CURRENCY_PATTERNS.items()
+]
+
+# Common invoice field patterns
+_FIELD_PATTERNS = {
+    'invoice_number': _compile_all([
+        r'invoice\s*#?\s*:?\s*([A-Z0-9\-]+)',
+        r'inv\s*#?\s*:?\s*([A-Z0-9\-]+)',
+        r'number\s*:?\s*([A-Z0-9\-]+)',
+    ]),
+    'date': _compile_all([
+        r'date\s*:?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
+        r'issued\s*:?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
+        r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
+    ]),
+    'total': _compile_all([
+        r'total\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+        r'amount\s*due\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+        r'balance\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+    ]),
+    'tax': _compile_all([
+        r'tax\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+        r'vat\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+        r'gst\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+    ]),
+    'subtotal': _compile_all([
+        r'subtotal\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+        r'sub\s*total\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
+    ]),
+}
+
+# All field patterns in one alternation for a single pass over the text. Each
+# pattern becomes the named group '<field>__<index>' inside a lookahead, so
+# overlapping hits (a 'total' inside 'subtotal') are still seen; its own
+# capture group is the group right after the named one. No two fields have
+# patterns that can match at the same position, so none shadow each other.
+# The currency groups ride along in the same alternation (no currency token
+# starts where a field pattern can), so one scan also detects the currency.
+_FIELD_RE = re.compile(
+    '(?=' + '|'.join([
+        f'(?P<{field}__{index}>{pattern.pattern})'
+        for field, patterns in _FIELD_PATTERNS.items()
+        for index, pattern in enumerate(patterns)
+    ] + _CURRENCY_ALTERNATIVES) + ')',
+    re.IGNORECASE
+)
+_FIELD_GROUPS = {
+    name: (field, int(index), _FIELD_RE.groupindex[name] + 1)
+    for name in _FIELD_RE.groupindex
+    if name not in _CURRENCY_PRIORITY
+    for field, _, index in [name.partition('__')]
+}
+
+# Hyperscan reports where each pattern matches but not its groups. Every field
+# and currency pattern goes into one database, with its position in
+# _SCAN_TARGETS as the id; only each field's winning match is re-run with re
+# to read its value.
+_SCAN_TARGETS = [
+    (field, index, pattern)
+    for field, patterns in _FIELD_PATTERNS.items()
+    for index, pattern in enumerate(patterns)
+] + [
+    ('currency', currency, pattern)
+    for currency, patterns in _CURRENCY_PATTERNS.items()
+    for pattern in patterns
+]
+
+
+def _compile_hyperscan_db():
+    """Compile _SCAN_TARGETS into a Hyperscan block-mode database, or None"""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    try:
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        database.compile(
+            expressions=[pattern.pattern.encode('utf-8') for _, _, pattern in _SCAN_TARGETS],
+            ids=list(range(len(_SCAN_TARGETS))),
+            elements=len(_SCAN_TARGETS),
+            flags=(hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST
+                   | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP),
+        )
+        return database
+    except hyperscan.error as e:
+        logger.warning(f"Hyperscan unavailable for invoice fields, using re: {e}")
+        return None
+
+
+_HYPERSCAN_DB = _compile_hyperscan_db()
+# Scratch space serves one scan at a time, so each thread keeps its own
+_hyperscan_local = threading.local()
+
+# Parts of a matched date with one consistent separator and a 4-digit year;
+# anything else is returned as matched by _parse_date()
+_DATE_PARTS_RE = re.compile(r'(\d{1,2})([\/\-\.])(\d{1,2})\2(\d{4})')
+
+# Line items kept per invoice
+_MAX_LINE_ITEMS = 10
+
+# Distinct texts whose extraction results extract_invoice_data() keeps
+_EXTRACTION_CACHE_SIZE = 128
+
+# Simple pattern for quantity, description, price: the first match on each
+# line, found in one pass over the whole text ([^\S\n] keeps it on one line).
+# These run over the whole text, so they use re2 when available.
+_LINE_ITEM_RE = _compile_linear(
+    r'(?m)^.*?(\d+)[^\S\n]+(.+?)[^\S\n]+[\$€£]?(\d+(?:\.\d{2})?)'
+)
+_EMAIL_RE = _compile_linear(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_PHONE_RE = _compile_linear(r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b')
+
+
+@dataclass(slots=True)
+class InvoiceRecord:
+    """
+    One extraction result as fixed slots instead of a per-document dict
+    
+    to_dict() gives the dictionary returned by extract_invoice_data(); get()
+    lets the dict-based helpers (confidence, validation, summary) read it too.
+    """
+    invoice_number: Optional[str] = None
+    date: Optional[str] = None
+    total_amount: Optional[float] = None
+    tax_amount: Optional[float] = None
+    subtotal: Optional[float] = None
+    currency: str = 'USD'
+    line_items: List[Dict[str, Any]] = field(default_factory=list)
+    vendor_info: Dict[str, str] = field(default_factory=dict)
+    customer_info: Dict[str, str] = field(default_factory=dict)
+    confidence_score: float = 0.0
+    raw_text: str = ''
+    extraction_timestamp: str = ''
+    error: Optional[str] = None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Dictionary form; 'error' is only included for failed extractions"""
+        result = {name: getattr(self, name) for name in _RECORD_FIELDS}
+        if self.error is not None:
+            result['error'] = self.error
+        return result
+
+
+_RECORD_FIELDS = tuple(f.name for f in dataclass_fields(InvoiceRecord) if f.name != 'error')
+
+
 class InvoiceDataExtractor:
     """
     Extract structured data from invoice text
     Handles various invoice formats and extracts key information
     """
     
-    def __init__(self):
-        """Initialize the invoice data extractor"""
-        self.currency_patterns = {
-            'USD': [r'\$', r'USD', r'US\$'],
-            'EUR': [r'€', r'EUR', r'EURO'],
-            'GBP': [r'£', r'GBP', r'POUND'],
-            'AUD': [r'A\$', r'AUD', r'AU\$'],
-        }
-        
-        # Common invoice field patterns
-        self.patterns = {
-            'invoice_number': [
-                r'invoice\s*#?\s*:?\s*([A-Z0-9\-]+)',
-                r'inv\s*#?\s*:?\s*([A-Z0-9\-]+)',
-                r'number\s*:?\s*([A-Z0-9\-]+)',
-            ],
-            'date': [
-                r'date\s*:?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
-                r'issued\s*:?\s*(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
-                r'(\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{2,4})',
-            ],
-            'total': [
-                r'total\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-                r'amount\s*due\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-                r'balance\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-            ],
-            'tax': [
-                r'tax\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-                r'vat\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-                r'gst\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-            ],
-            'subtotal': [
-                r'subtotal\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-                r'sub\s*total\s*:?\s*[\$€£]?(\d+(?:\.\d{2})?)',
-            ],
-        }
+    # Shared, compiled once at import; the extractor holds no per-instance state
+    currency_patterns = _CURRENCY_PATTERNS
+    patterns = _FIELD_PATTERNS
     
-    def extract_invoice_data(self, text: str) -> Dict[str, Any]:
+    def extract_invoice_data(self, text: str, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """
         Extract structured data from invoice text
         
         Args:
             text: Raw text from invoice document
+            timestamp: ISO extraction timestamp to record; the current UTC
+                time when not given
             
         Returns:
             Dictionary with extracted invoice data
         """
+        return self.extract_invoice_record(text, timestamp).to_dict()
+    
+    def extract_invoice_record(self, text: str, timestamp: Optional[str] = None) -> InvoiceRecord:
+        """Extract structured data from invoice text as an InvoiceRecord"""
+        timestamp = timestamp or datetime.utcnow().isoformat()
         if not text or not text.strip():
-            return self._empty_result("No text provided")
-        
-        text_lower = text.lower()
+            return InvoiceRecord(extraction_timestamp=timestamp, error="No text provided")
         
         try:
-            result = {
-                'invoice_number': self._extract_invoice_number(text_lower),
-                'date': self._extract_date(text_lower),
-                'total_amount': self._extract_total(text_lower),
-                'tax_amount': self._extract_tax(text_lower),
-                'subtotal': self._extract_subtotal(text_lower),
-                'currency': self._detect_currency(text),
-                'line_items': self._extract_line_items(text),
-                'vendor_info': self._extract_vendor_info(text),
-                'customer_info': self._extract_customer_info(text),
-                'confidence_score': 0.0,
-                'raw_text': text[:500] + "..." if len(text) > 500 else text,  # Truncated for storage
-                'extraction_timestamp': datetime.utcnow().isoformat(),
-            }
+            fields = self._match_fields(text)
+            record = InvoiceRecord(
+                invoice_number=fields.get('invoice_number'),
+                date=self._parse_date(fields.get('date')),
+                total_amount=self._parse_amount(fields.get('total')),
+                tax_amount=self._parse_amount(fields.get('tax')),
+                subtotal=self._parse_amount(fields.get('subtotal')),
+                currency=fields.get('currency', 'USD'),  # Default currency
+                line_items=self._extract_line_items(text),
+                vendor_info=self._extract_vendor_info(text),
+                customer_info=self._extract_customer_info(text),
+                raw_text=text[:500] + "..." if len(text) > 500 else text,  # Truncated for storage
+                extraction_timestamp=timestamp,
+            )
             
             # Calculate confidence score
-            result['confidence_score'] = self._calculate_confidence(result)
+            record.confidence_score = self._calculate_confidence(record)
             
-            return result
+            return record
             
         except Exception as e:
             logger.error(f"Invoice data extraction failed: {e}")
-            return self._empty_result(f"Extraction error: {str(e)}")
+            return InvoiceRecord(extraction_timestamp=timestamp, error=f"Extraction error: {str(e)}")
     
-    def _extract_invoice_number(self, text: str) -> Optional[str]:
-        """Extract invoice number from text"""
-        for pattern in self.patterns['invoice_number']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
+    def extract_invoice_data_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract structured data from several invoice texts
+        
+        All results share one extraction timestamp, taken once for the batch.
+        """
+        timestamp = datetime.utcnow().isoformat()
+        return [self.extract_invoice_data(text, timestamp) for text in texts]
     
-    def _extract_date(self, text: str) -> Optional[str]:
-        """Extract invoice date from text"""
-        for pattern in self.patterns['date']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                date_str = match.group(1).strip()
-                # Try to normalize the date format
-                try:
-                    # Handle various date formats
-                    for fmt in ['%m/%d/%Y', '%d/%m/%Y', '%m-%d-%Y', '%d-%m-%Y', '%m.%d.%Y', '%d.%m.%Y']:
-                        try:
-                            parsed_date = datetime.strptime(date_str, fmt)
-                            return parsed_date.strftime('%Y-%m-%d')
-                        except ValueError:
-                            continue
-                    return date_str  # Return as-is if parsing fails
-                except:
-                    return date_str
-        return None
+    def extract_many(self, texts: List[str]) -> Dict[str, List[Any]]:
+        """
+        Extract several invoice texts into columns, one list per field
+        
+        Column i of every field belongs to texts[i], which suits filtering and
+        totalling a batch field by field; no per-document dict is built.
+        'error' holds None for each successful extraction.
+        """
+        timestamp = datetime.utcnow().isoformat()
+        records = [self.extract_invoice_record(text, timestamp) for text in texts]
+        return {
+            name: [getattr(record, name) for record in records]
+            for name in _RECORD_FIELDS + ('error',)
+        }
     
-    def _extract_total(self, text: str) -> Optional[float]:
-        """Extract total amount from text"""
-        for pattern in self.patterns['total']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+    def _match_fields(self, text: str) -> Dict[str, str]:
+        """
+        Find the raw value of every invoice field and the currency in a single scan
+        
+        For each field the first pattern in _FIELD_PATTERNS that matches
+        anywhere wins, and its leftmost match is used. The currency, if any
+        is found, is ranked by _CURRENCY_PRIORITY and stored under 'currency'.
+        """
+        if _HYPERSCAN_DB is not None:
+            return self._match_fields_hyperscan(text)
+        
+        best = {}
+        currency = None
+        for match in _FIELD_RE.finditer(text):
+            name = match.lastgroup
+            if name in _CURRENCY_PRIORITY:
+                if currency is None or _CURRENCY_PRIORITY[name] < _CURRENCY_PRIORITY[currency]:
+                    currency = name
+                continue
+            field, index, group = _FIELD_GROUPS[name]
+            if field not in best or index < best[field][0]:
+                best[field] = (index, match.group(group).strip())
+        fields = {field: value for field, (_, value) in best.items()}
+        if currency:
+            fields['currency'] = currency
+        return fields
     
-    def _extract_tax(self, text: str) -> Optional[float]:
-        """Extract tax amount from text"""
-        for pattern in self.patterns['tax']:
-            match = re.search(pattern, text, re.IGNORECASE)
+    def _match_fields_hyperscan(self, text: str) -> Dict[str, str]:
+        """
+        Same result as _match_fields(), from one Hyperscan pass
+        
+        Hyperscan gives the leftmost start of every pattern that matches;
+        each field's winning pattern is then matched with re at that start
+        to read its capture group.
+        """
+        scratch = getattr(_hyperscan_local, 'scratch', None)
+        if scratch is None:
+            scratch = _hyperscan_local.scratch = hyperscan.Scratch(_HYPERSCAN_DB)
+        
+        starts = {}
+        def on_match(target, start, end, flags, context):
+            if target not in starts or start < starts[target]:
+                starts[target] = start
+        
+        data = text.encode('utf-8')
+        _HYPERSCAN_DB.scan(data, match_event_handler=on_match, scratch=scratch)
+        
+        best = {}
+        currency = None
+        for target, start in starts.items():
+            field, key, _ = _SCAN_TARGETS[target]
+            if field == 'currency':
+                if currency is None or _CURRENCY_PRIORITY[key] < _CURRENCY_PRIORITY[currency]:
+                    currency = key
+            elif field not in best or key < best[field][0]:
+                best[field] = (key, start)
+        
+        fields = {}
+        for field, (index, start) in best.items():
+            if len(data) != len(text):
+                start = len(data[:start].decode('utf-8'))  # Byte offset to str index
+            pattern = _FIELD_PATTERNS[field][index]
+            match = pattern.match(text, start) or pattern.search(text)
             if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+                fields[field] = match.group(1).strip()
+        if currency:
+            fields['currency'] = currency
+        return fields
     
-    def _extract_subtotal(self, text: str) -> Optional[float]:
-        """Extract subtotal from text"""
-        for pattern in self.patterns['subtotal']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+    def _parse_date(self, date_str: Optional[str]) -> Optional[str]:
+        """
+        Normalize a matched date to YYYY-MM-DD, reading it as month-first and
+        falling back to day-first (e.g. 13/02/2024). Dates that fit neither are
+        returned as-is.
+        """
+        if date_str is None:
+            return None
+        parts = _DATE_PARTS_RE.fullmatch(date_str)
+        if parts is None:
+            return date_str
+        first, second, year = int(parts.group(1)), int(parts.group(3)), int(parts.group(4))
+        if year >= MINYEAR:
+            # Range checks instead of strptime attempts, so no ValueError per miss
+            for month, day in ((first, second), (second, first)):
+                if 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]:
+                    return date(year, month, day).isoformat()
+        return date_str  # Return as-is if parsing fails
     
-    def _detect_currency(self, text: str) -> str:
-        """Detect currency from text"""
-        for currency, patterns in self.currency_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return currency
-        return 'USD'  # Default currency
+    def _parse_amount(self, amount_str: Optional[str]) -> Optional[float]:
+        """Convert a matched amount to float"""
+        if amount_str is None:
+            return None
+        try:
+            return float(amount_str)
+        except ValueError:
+            return None
     
     def _extract_line_items(self, text: str) -> List[Dict[str, Any]]:
         """Extract line items from invoice (simplified implementation)"""
         line_items = []
         
-        # Look for common line item patterns
-        lines = text.split('\n')
-        for line in lines:
-            # Simple pattern for quantity, description, price
-            pattern = r'(\d+)\s+(.+?)\s+[\$€£]?(\d+(?:\.\d{2})?)'
-            match = re.search(pattern, line.strip())
-            if match:
-                try:
-                    line_items.append({
-                        'quantity': int(match.group(1)),
-                        'description': match.group(2).strip(),
-                        'unit_price': float(match.group(3)),
-                        'total_price': int(match.group(1)) * float(match.group(3))
-                    })
-                except ValueError:
-                    continue
+        # Look for common line item patterns, limited to 10 items to avoid too much data
+        for match in islice(_LINE_ITEM_RE.finditer(text), _MAX_LINE_ITEMS):
+            # The pattern only captures digits, so the conversions cannot fail
+            quantity = int(match.group(1))
+            unit_price = float(match.group(3))
+            line_items.append({
+                'quantity': quantity,
+                'description': match.group(2).strip(),
+                'unit_price': unit_price,
+                'total_price': quantity * unit_price
+            })
         
-        return line_items[:10]  # Limit to 10 items to avoid too much data
+        return line_items
     
     def _extract_vendor_info(self, text: str) -> Dict[str, str]:
         """Extract vendor information (simplified)"""
         vendor_info = {}
         
         # Look for email addresses
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        email_match = re.search(email_pattern, text)
+        email_match = _EMAIL_RE.search(text)
         if email_match:
             vendor_info['email'] = email_match.group()
         
         # Look for phone numbers
-        phone_pattern = r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b'
-        phone_match = re.search(phone_pattern, text)
+        phone_match = _PHONE_RE.search(text)
         if phone_match:
             vendor_info['phone'] = phone_match.group()
         
@@ -212,7 +432,7 @@ class InvoiceDataExtractor:
         # parsing logic to distinguish between vendor and customer information
         return {}
     
-    def _calculate_confidence(self, result: Dict[str, Any]) -> float:
+    def _calculate_confidence(self, result: Any) -> float:
         """Calculate confidence score based on extracted data"""
         score = 0.0
         max_score = 7.0
@@ -233,23 +453,11 @@ class InvoiceDataExtractor:
         
         return min(score / max_score, 1.0)
     
-    def _empty_result(self, error_message: str = "") -> Dict[str, Any]:
+    def _empty_result(self, error_message: str = "", timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Return empty result structure"""
-        return {
-            'invoice_number': None,
-            'date': None,
-            'total_amount': None,
-            'tax_amount': None,
-            'subtotal': None,
-            'currency': 'USD',
-            'line_items': [],
-            'vendor_info': {},
-            'customer_info': {},
-            'confidence_score': 0.0,
-            'raw_text': '',
-            'extraction_timestamp': datetime.utcnow().isoformat(),
-            'error': error_message if error_message else None,
-        }
+        result = InvoiceRecord(extraction_timestamp=timestamp or datetime.utcnow().isoformat()).to_dict()
+        result['error'] = error_message if error_message else None
+        return result
     
     def validate_extraction(self, result: Dict[str, Any]) -> Tuple[bool, List[str]]:
         """
@@ -312,8 +520,34 @@ def extract_invoice_data(text: str) -> Dict[str, Any]:
     Args:
         text: Raw text from invoice
         
+    Results are cached by text, so a repeated text (a retry, reprocess or
+    duplicate upload) is not extracted again; every call gets its own copy
+    with a fresh extraction timestamp.
+    
     Returns:
         Extracted invoice data dictionary
     """
-    extractor = InvoiceDataExtractor()
-    return extractor.extract_invoice_data(text)
+    result = copy.deepcopy(_extract_invoice_data_cached(text))
+    result['extraction_timestamp'] = datetime.utcnow().isoformat()
+    return result
+
+
+def to_json(result: Dict[str, Any]) -> str:
+    """
+    Serialize an extraction result for storage, with orjson when installed
+    
+    orjson writes compact, unescaped UTF-8; json.loads() reads both forms back
+    to the same data.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(result).decode('utf-8')
+    return json.dumps(result)
+
+
+@lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
+def _extract_invoice_data_cached(text: str) -> Dict[str, Any]:
+    return _EXTRACTOR.extract_invoice_data(text)
+
+
+# Stateless, so one instance serves every extract_invoice_data() call
+_EXTRACTOR = InvoiceDataExtractor()
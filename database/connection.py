@@ -3,12 +3,38 @@ Database connection management for the middleware application
 """
 import sqlite3
 import os
+import threading
+from datetime import date
 from typing import Optional, Dict, Any, List
 from contextlib import contextmanager
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns of the documents table that callers may set on insert
+DOCUMENT_COLUMNS = (
+    'filename', 'original_filename', 'file_path', 'file_size',
+    'content_type', 'upload_date', 'processed_date', 'status',
+    'ocr_text', 'extracted_data', 'error_message', 'vendor',
+    'amount', 'extracted_text', 'ai_response', 'file_hash'
+)
+_DOCUMENT_COLUMN_SET = frozenset(DOCUMENT_COLUMNS)
+
+
+@lru_cache(maxsize=64)
+def _insert_document_sql(columns: tuple) -> str:
+    """INSERT statement for the given documents columns, built once per column tuple"""
+    placeholders = ', '.join(['?' for _ in columns])
+    return f"INSERT INTO documents ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+@lru_cache(maxsize=64)
+def _update_document_sql(columns: tuple) -> str:
+    """UPDATE-by-id statement for the given documents columns, built once per column tuple"""
+    set_clause = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE documents SET {set_clause} WHERE id = ?"
+
 
 class DatabaseManager:
     """Manages database connections and operations"""
@@ -22,6 +48,8 @@ class DatabaseManager:
         """
         self.config = config
         self.db_path = self._get_db_path()
+        # One connection per thread, reused across calls, see get_connection()
+        self._local = threading.local()
         self._ensure_db_directory()
         self._initialize_database()
 
@@ -43,6 +71,10 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
 
+                # Write-ahead logging: readers don't block the writer, and with
+                # synchronous=NORMAL (see get_connection) a commit needs no fsync
+                cursor.execute("PRAGMA journal_mode=WAL")
+
                 # Create documents table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS documents (
@@ -61,10 +93,34 @@ class DatabaseManager:
                         vendor TEXT,
                         amount REAL,
                         extracted_text TEXT,
-                        ai_response TEXT
+                        ai_response TEXT,
+                        file_hash TEXT
                     )
                 ''')
 
+                # Databases created before file_hash was added to the schema
+                self._add_missing_column(cursor, 'documents', 'file_hash', 'TEXT')
+
+                # SHA-256 of the file content, used for duplicate checks and
+                # to reuse the results of an already processed copy
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_documents_file_hash ON documents(file_hash)"
+                )
+
+                # get_stats() groups by status and list_documents() pages by newest
+                # upload (read backwards from this index); the status listings page
+                # one status by newest upload from the composite index. Names match
+                # the SQL migrations.
+                # ALTER TABLE can't add the CURRENT_TIMESTAMP default, so a column
+                # added to an older table stays NULL until set
+                self._add_missing_column(cursor, 'documents', 'upload_date', 'TIMESTAMP')
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents(upload_date)")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_documents_status_upload_date "
+                    "ON documents(status, upload_date)"
+                )
+
                 # Create extracted_data table (might be redundant if documents table stores all)
                 # Keeping it for now based on your initial structure, but consider if all data
                 # can be normalized into the 'documents' table.
@@ -83,6 +139,9 @@ class DatabaseManager:
                         FOREIGN KEY (document_id) REFERENCES documents (id)
                     )
                 ''')
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_extracted_data_document ON extracted_data(document_id)"
+                )
 
                 # Create processing_stats table
                 cursor.execute('''
@@ -96,6 +155,17 @@ class DatabaseManager:
                     )
                 ''')
 
+                # processing_stats tables created by the SQL migrations lack this column
+                self._add_missing_column(cursor, 'processing_stats', 'total_processing_time', 'REAL DEFAULT 0.0')
+
+                # One stats row per day, see record_processing()
+                try:
+                    cursor.execute(
+                        "CREATE UNIQUE INDEX IF NOT EXISTS idx_processing_stats_day ON processing_stats(date)"
+                    )
+                except sqlite3.IntegrityError:
+                    logger.warning("processing_stats has several rows for one date; daily stats will not be recorded")
+
                 conn.commit()
                 logger.info("Database initialized successfully")
 
@@ -103,22 +173,46 @@ class DatabaseManager:
             logger.error(f"Database initialization failed: {e}")
             raise
 
+    @staticmethod
+    def _add_missing_column(cursor, table: str, column: str, declaration: str):
+        """Add a column to an existing table if an older schema lacks it"""
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager"""
-        conn = None
-        try:
-            conn = sqlite3.connect(self.db_path)
+        """
+        Get this thread's database connection with context manager
+
+        The connection is opened on first use in each thread and kept open
+        for later calls; uncommitted changes are rolled back on error. A
+        forked child inherits the parent's thread-local but must not share
+        its SQLite connection, so connections are also keyed by process.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Connections are long-lived, so keep more prepared statements (the
+            # default is 128) and a 20 MB page cache (negative size is in KiB)
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
             conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-20000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        try:
             yield conn
         except Exception as e:
-            if conn:
-                conn.rollback()
+            conn.rollback()
             logger.error(f"Database connection error: {e}")
             raise
-        finally:
-            if conn:
-                conn.close()
+
+    def close(self):
+        """Close the calling thread's database connection, if it has one"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
 
     def execute_query(self, query: str, params: tuple = None) -> list:
         """Execute a SELECT query and return results"""
@@ -147,19 +241,8 @@ class DatabaseManager:
         This replaces the old 'insert_document' to be more generic.
         """
         # Filter data to only include columns present in the documents table
-        # This list should ideally be maintained or fetched dynamically from schema
-        allowed_columns = [
-            'filename', 'original_filename', 'file_path', 'file_size',
-            'content_type', 'upload_date', 'processed_date', 'status',
-            'ocr_text', 'extracted_data', 'error_message', 'vendor',
-            'amount', 'extracted_text', 'ai_response'
-        ]
-        
-        insert_data = {k: v for k, v in data.items() if k in allowed_columns}
-
-        columns = ', '.join(insert_data.keys())
-        placeholders = ', '.join(['?' for _ in insert_data.values()])
-        query = f"INSERT INTO documents ({columns}) VALUES ({placeholders})"
+        insert_data = {k: v for k, v in data.items() if k in _DOCUMENT_COLUMN_SET}
+        query = _insert_document_sql(tuple(insert_data))
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -167,29 +250,43 @@ class DatabaseManager:
             conn.commit()
             return cursor.lastrowid
 
+    def store_documents(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert several document records in a single transaction
+
+        Rows that set the same columns are inserted with one executemany;
+        columns a row leaves out keep their table defaults. Returns the new
+        document IDs in the order of the rows.
+        """
+        groups = {}
+        for position, data in enumerate(rows):
+            insert_data = {k: v for k, v in data.items() if k in _DOCUMENT_COLUMN_SET}
+            groups.setdefault(tuple(insert_data), []).append((position, tuple(insert_data.values())))
+
+        ids = [None] * len(rows)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for columns, members in groups.items():
+                cursor.executemany(_insert_document_sql(columns), [values for _, values in members])
+                # AUTOINCREMENT ids within one transaction are consecutive
+                last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+                first_id = last_id - len(members) + 1
+                for offset, (position, _) in enumerate(members):
+                    ids[position] = first_id + offset
+            conn.commit()
+        return ids
+
     def update_document(self, doc_id: int, **kwargs) -> bool:
         """Update document by ID with provided fields"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                # Build the SET clause dynamically
-                set_clauses = []
-                values = []
-
-                for key, value in kwargs.items():
-                    set_clauses.append(f"{key} = ?")
-                    values.append(value)
-
-                if not set_clauses:
+                if not kwargs:
                     return False
 
-                # Add doc_id to values for WHERE clause
-                values.append(doc_id)
-
-                set_clause = ", ".join(set_clauses)
-                query = f"UPDATE documents SET {set_clause} WHERE id = ?"
-
-                cursor.execute(query, values)
+                # The SET clause is built once per set of fields; doc_id fills the WHERE clause
+                query = _update_document_sql(tuple(kwargs))
+                cursor.execute(query, (*kwargs.values(), doc_id))
                 conn.commit()
 
                 # Check if any rows were updated
@@ -221,6 +318,24 @@ class DatabaseManager:
             logger.error(f"Database error getting document {doc_id}: {e}")
             return None
 
+    def get_completed_document_by_hash(self, file_hash: str,
+                                       exclude_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Get the most recently processed completed document with the given content hash"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT * FROM documents WHERE file_hash = ? AND status = 'completed' "
+                    "AND extracted_data IS NOT NULL AND id != ? ORDER BY processed_date DESC LIMIT 1",
+                    (file_hash, -1 if exclude_id is None else exclude_id)
+                )
+                row = cursor.fetchone()
+                return dict(row) if row else None
+
+        except sqlite3.Error as e:
+            logger.error(f"Database error looking up document by hash: {e}")
+            return None
+
     def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Get list of documents"""
         query = "SELECT * FROM documents ORDER BY upload_date DESC LIMIT ? OFFSET ?"
@@ -229,24 +344,57 @@ class DatabaseManager:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get processing statistics"""
-        stats = {}
-
-        # Total documents
-        result = self.execute_query("SELECT COUNT(*) as count FROM documents")
-        stats['total_documents'] = result[0]['count'] if result else 0
-
-        # Processed documents
-        result = self.execute_query("SELECT COUNT(*) as count FROM documents WHERE status = 'completed'")
-        stats['processed_documents'] = result[0]['count'] if result else 0
-
-        # Failed documents
-        result = self.execute_query("SELECT COUNT(*) as count FROM documents WHERE status = 'failed'")
-        stats['failed_documents'] = result[0]['count'] if result else 0
-
-        # Pending documents
-        result = self.execute_query("SELECT COUNT(*) as count FROM documents WHERE status = 'pending'")
-        stats['pending_documents'] = result[0]['count'] if result else 0
+        # One grouped count instead of a query per status; the total is their sum
+        counts = {
+            row['status']: row['count']
+            for row in self.execute_query("SELECT status, COUNT(*) as count FROM documents GROUP BY status")
+        }
+        return {
+            'total_documents': sum(counts.values()),
+            'processed_documents': counts.get('completed', 0),
+            'failed_documents': counts.get('failed', 0),
+            'pending_documents': counts.get('pending', 0),
+        }
+
+    def record_processing(self, success: bool, processing_time: float):
+        """
+        Add one processed document to today's processing_stats row
 
+        A single UPSERT creates or increments the row, so concurrent workers
+        never lose an update and no SELECT round-trip is needed.
+        """
+        try:
+            self.execute_update(
+                '''
+                INSERT INTO processing_stats
+                    (date, documents_processed, successful_extractions, failed_extractions, total_processing_time)
+                VALUES (?, 1, ?, ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                    documents_processed = documents_processed + 1,
+                    successful_extractions = successful_extractions + excluded.successful_extractions,
+                    failed_extractions = failed_extractions + excluded.failed_extractions,
+                    total_processing_time = total_processing_time + excluded.total_processing_time
+                ''',
+                (date.today().isoformat(), int(success), int(not success), processing_time)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Database error recording processing stats: {e}")
+
+    def get_processing_stats(self, day: Optional[date] = None) -> Dict[str, Any]:
+        """Get the processing stats for a day (default today), with the average processing time"""
+        result = self.execute_query(
+            "SELECT documents_processed, successful_extractions, failed_extractions, total_processing_time "
+            "FROM processing_stats WHERE date = ?",
+            ((day or date.today()).isoformat(),)
+        )
+        stats = dict(result[0]) if result else {
+            'documents_processed': 0,
+            'successful_extractions': 0,
+            'failed_extractions': 0,
+            'total_processing_time': 0.0,
+        }
+        processed = stats['documents_processed']
+        stats['avg_processing_time'] = stats['total_processing_time'] / processed if processed else 0.0
         return stats
 
     def delete_document(self, doc_id: int) -> bool:
@@ -6,16 +6,18 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy import create_engine
-from database.models import Base, ProcessingStats, Document
+from database.models import metadata, ProcessingStats, Document
 from config.settings import Config
 
 def create_tables():
     """Create all tables, including the new ProcessingStats table"""
     try:
-        engine = create_engine(Config.DATABASE_URL)
+        # A larger compiled-statement cache than the default 500 so repeated
+        # DML against these tables is compiled once
+        engine = create_engine(Config.DATABASE_URL, query_cache_size=1200)
         
-        # Create all tables defined in Base.metadata
-        Base.metadata.create_all(engine)
+        # Create all tables defined in the shared metadata
+        metadata.create_all(engine)
         
         print("✅ All tables created successfully!")
         print("📊 Tables created:")
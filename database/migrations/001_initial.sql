@@ -190,6 +190,7 @@ ALTER TABLE documents ADD COLUMN hash_algorithm VARCHAR(20) DEFAULT 'SHA256';
 -- Performance Indexes
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
 CREATE INDEX IF NOT EXISTS idx_documents_upload_date ON documents(upload_date);
+CREATE INDEX IF NOT EXISTS idx_documents_status_upload_date ON documents(status, upload_date);
 CREATE INDEX IF NOT EXISTS idx_documents_vendor ON documents(vendor_name);
 CREATE INDEX IF NOT EXISTS idx_documents_invoice_date ON documents(invoice_date);
 CREATE INDEX IF NOT EXISTS idx_documents_bigcapital_status ON documents(bigcapital_status);
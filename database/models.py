@@ -1,18 +1,29 @@
 # database/models.py
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, Index
 from datetime import datetime
 
 # This is the base class for your declarative models
 Base = declarative_base()
 
+# Shared by every engine that creates or reflects these tables; build
+# statements against it rather than a fresh MetaData() each time
+metadata = Base.metadata
+
 # Example Model (you'll have your actual models here, e.g., Document, User, etc.)
 class Document(Base):
     __tablename__ = 'documents'  # Essential for SQLAlchemy to know the table name
+    __table_args__ = (
+        # Listing one status newest first seeks straight to it
+        Index('idx_documents_status_upload_date', 'status', 'upload_date'),
+    )
+
     id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False)
     file_path = Column(String(512), nullable=False, unique=True)
-    upload_date = Column(DateTime, default=datetime.utcnow)
+    file_hash = Column(String(64), index=True)  # SHA-256 of the content, for duplicate checks
+    upload_date = Column(DateTime, default=datetime.utcnow, index=True)
+    status = Column(String(50), default='pending', index=True)  # 'pending', 'processing', 'completed', 'failed'
     extracted_text = Column(Text)
     # Add other fields as per your application's needs
     
@@ -3,10 +3,20 @@ Document processor for handling file uploads and processing
 """
 import os
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from functools import lru_cache
 import json
 import re
+import tempfile
+
+from config.settings import Config
+from core import tesseract_engine
+from core.tesseract_engine import TesseractEngine, split_pages, write_image_list
+from core.text_extractor import to_json
+from database.connection import DatabaseManager
 
 # OCR and document processing imports
 try:
@@ -20,6 +30,68 @@ except ImportError:
 # Configuration for simulation vs real processing
 USE_SIMULATION = not OCR_AVAILABLE  # Set to False to use real OCR when libraries are available
 
+# Resolution scanned PDF pages are rendered at for OCR
+_PDF_OCR_DPI = 200
+
+# Single-page image types that extract_text_from_images() can OCR in one run
+_BATCH_OCR_EXTENSIONS = frozenset(('jpg', 'jpeg', 'png'))
+
+# Currency patterns with their corresponding ISO codes, compiled once
+_CURRENCY_PATTERNS = tuple((re.compile(pattern, re.IGNORECASE), code) for pattern, code in (
+    # Currency symbols with context (looking for amounts)
+    (r'\$\s*\d+', 'USD'),  # $ symbol (default to USD)
+    (r'AU?\$\s*\d+', 'AUD'),  # A$ or AU$ symbol
+    (r'C\$\s*\d+', 'CAD'),  # C$ symbol
+    (r'€\s*\d+', 'EUR'),  # € symbol
+    (r'£\s*\d+', 'GBP'),  # £ symbol
+    (r'¥\s*\d+', 'JPY'),  # ¥ symbol
+    (r'CHF\s*\d+', 'CHF'),  # CHF symbol
+    
+    # ISO currency codes (more specific patterns)
+    (r'\b(AUD)\b.*\d+', 'AUD'),
+    (r'\b(USD)\b.*\d+', 'USD'),
+    (r'\b(EUR)\b.*\d+', 'EUR'),
+    (r'\b(GBP)\b.*\d+', 'GBP'),
+    (r'\b(CAD)\b.*\d+', 'CAD'),
+    (r'\b(JPY)\b.*\d+', 'JPY'),
+    (r'\b(CHF)\b.*\d+', 'CHF'),
+    
+    # Reverse patterns (amount followed by currency)
+    (r'\d+.*\b(AUD)\b', 'AUD'),
+    (r'\d+.*\b(USD)\b', 'USD'),
+    (r'\d+.*\b(EUR)\b', 'EUR'),
+    (r'\d+.*\b(GBP)\b', 'GBP'),
+    (r'\d+.*\b(CAD)\b', 'CAD'),
+    (r'\d+.*\b(JPY)\b', 'JPY'),
+    (r'\d+.*\b(CHF)\b', 'CHF'),
+))
+
+_INVOICE_NUMBER_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'invoice\s*#?\s*:?\s*([A-Z0-9\-]+)',
+    r'inv\.\s*#?\s*:?\s*([A-Z0-9\-]+)',
+    r'bill\s*#?\s*:?\s*([A-Z0-9\-]+)',
+))
+
+_DATE_RE = re.compile(r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})')
+
+# Total amount patterns (currency-aware); the amount-then-code pattern
+# depends on the currency, see _amount_with_code_re()
+_AMOUNT_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'total\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
+    r'amount\s*due\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
+    r'balance\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
+    r'[\$€£¥]\s*(\d+\.?\d*)\s*total',
+))
+
+# Lines that can't be the vendor name: a leading date, or only numbers/symbols
+_VENDOR_REJECT_RE = re.compile(r'^(?:\d+[\/\-]\d+[\/\-]\d+|[\d\$\.\-\s€£¥]+$)')
+
+
+@lru_cache(maxsize=32)
+def _amount_with_code_re(currency: str):
+    """Amount followed by the currency code, compiled once per currency"""
+    return re.compile(r'(\d+\.?\d*)\s*' + currency, re.IGNORECASE)
+
 
 class DocumentProcessor:
     """Handles document processing and integration with BigCapital"""
@@ -39,7 +111,20 @@ class DocumentProcessor:
         # Get processing configuration
         self.max_file_size = int(config.get('processing', 'max_file_size', '10485760'))  # 10MB default
         self.allowed_extensions = config.get('processing', 'allowed_extensions', 'pdf,jpg,jpeg,png,txt').split(',')
+        # Normalized once, so is_allowed_file() is a single set lookup
+        self._allowed_ext = frozenset(ext.strip().lower().lstrip('.') for ext in self.allowed_extensions) - {''}
         self.upload_folder = config.get('processing', 'upload_folder', 'uploads')
+        # 'blocks' reads each PDF page's text blocks in reading order; 'text'
+        # keeps PyMuPDF's plain extraction order
+        self.pdf_text_mode = config.get('processing', 'pdf_text_mode', 'blocks').strip().lower()
+        # PDF pages with fewer text-layer characters than this are treated as
+        # scanned and OCRed; 0 never OCRs a PDF page
+        self.pdf_ocr_min_chars = int(config.get('processing', 'pdf_ocr_min_chars', '1'))
+        # Off by default: processing is synchronous, so the success or failure
+        # UPDATE is the only write most documents need
+        self.publish_intermediate_state = (
+            config.get('processing', 'publish_intermediate_state', 'false').lower() == 'true'
+        )
         
         # Currency configuration
         self.default_currency = config.get('currency', 'default', 'USD')
@@ -50,9 +135,8 @@ class DocumentProcessor:
         self.tesseract_path = config.get('ocr', 'tesseract_path', None)
         if self.tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = self.tesseract_path
-        
-        # Ensure upload folder exists
-        os.makedirs(self.upload_folder, exist_ok=True)
+        # Single-block page segmentation, as receipts and invoices are one block of text
+        self._ocr_engine = TesseractEngine(psm=6)
         
         # Log configuration status
         if USE_SIMULATION:
@@ -60,8 +144,8 @@ class DocumentProcessor:
         else:
             self.logger.info("OCR processing enabled")
         
-        self.logger.info(f"DocumentProcessor initialized with upload folder: {self.upload_folder}")
-        self.logger.info(f"Currency configuration - Default: {self.default_currency}, Supported: {self.supported_currencies}")
+        self.logger.info("DocumentProcessor initialized with upload folder: %s", self.upload_folder)
+        self.logger.info("Currency configuration - Default: %s, Supported: %s", self.default_currency, self.supported_currencies)
     
     def detect_currency_from_text(self, ocr_text: str) -> Optional[str]:
         """
@@ -74,43 +158,12 @@ class DocumentProcessor:
             str or None: Detected currency code or None if not found
         """
         try:
-            # Define currency patterns with their corresponding ISO codes
-            currency_patterns = [
-                # Currency symbols with context (looking for amounts)
-                (r'\$\s*\d+', 'USD'),  # $ symbol (default to USD)
-                (r'AU?\$\s*\d+', 'AUD'),  # A$ or AU$ symbol
-                (r'C\$\s*\d+', 'CAD'),  # C$ symbol
-                (r'€\s*\d+', 'EUR'),  # € symbol
-                (r'£\s*\d+', 'GBP'),  # £ symbol
-                (r'¥\s*\d+', 'JPY'),  # ¥ symbol
-                (r'CHF\s*\d+', 'CHF'),  # CHF symbol
-                
-                # ISO currency codes (more specific patterns)
-                (r'\b(AUD)\b.*\d+', 'AUD'),
-                (r'\b(USD)\b.*\d+', 'USD'),
-                (r'\b(EUR)\b.*\d+', 'EUR'),
-                (r'\b(GBP)\b.*\d+', 'GBP'),
-                (r'\b(CAD)\b.*\d+', 'CAD'),
-                (r'\b(JPY)\b.*\d+', 'JPY'),
-                (r'\b(CHF)\b.*\d+', 'CHF'),
-                
-                # Reverse patterns (amount followed by currency)
-                (r'\d+.*\b(AUD)\b', 'AUD'),
-                (r'\d+.*\b(USD)\b', 'USD'),
-                (r'\d+.*\b(EUR)\b', 'EUR'),
-                (r'\d+.*\b(GBP)\b', 'GBP'),
-                (r'\d+.*\b(CAD)\b', 'CAD'),
-                (r'\d+.*\b(JPY)\b', 'JPY'),
-                (r'\d+.*\b(CHF)\b', 'CHF'),
-            ]
-            
             detected_currencies = []
             
-            for pattern, currency_code in currency_patterns:
-                matches = re.findall(pattern, ocr_text, re.IGNORECASE)
-                if matches:
+            for pattern, currency_code in _CURRENCY_PATTERNS:
+                if pattern.search(ocr_text):
                     detected_currencies.append(currency_code)
-                    self.logger.debug(f"Currency pattern matched: {pattern} -> {currency_code}")
+                    self.logger.debug("Currency pattern matched: %s -> %s", pattern.pattern, currency_code)
             
             if detected_currencies:
                 # Return the most common currency detected, or first if tied
@@ -120,16 +173,16 @@ class DocumentProcessor:
                 
                 # Verify the detected currency is in our supported list
                 if most_common_currency in self.supported_currencies:
-                    self.logger.info(f"Currency detected: {most_common_currency} (from {len(detected_currencies)} matches)")
+                    self.logger.info("Currency detected: %s (from %s matches)", most_common_currency, len(detected_currencies))
                     return most_common_currency
                 else:
-                    self.logger.warning(f"Detected currency {most_common_currency} not in supported currencies: {self.supported_currencies}")
+                    self.logger.warning("Detected currency %s not in supported currencies: %s", most_common_currency, self.supported_currencies)
             
             self.logger.debug("No currency detected from text")
             return None
             
         except Exception as e:
-            self.logger.error(f"Error detecting currency from text: {str(e)}")
+            self.logger.error("Error detecting currency from text: %s", e)
             return None
     
     def get_file_info(self, file_path: str) -> Dict[str, Any]:
@@ -143,10 +196,7 @@ class DocumentProcessor:
             dict: File information including size, name, extension, etc.
         """
         try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
-            file_size = os.path.getsize(file_path)
+            file_size = self._file_size(file_path)
             filename = os.path.basename(file_path)
             file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
             
@@ -160,7 +210,7 @@ class DocumentProcessor:
                 'exists': True
             }
         except Exception as e:
-            self.logger.error(f"Error getting file info for {file_path}: {str(e)}")
+            self.logger.error("Error getting file info for %s: %s", file_path, e)
             return {
                 'filename': os.path.basename(file_path) if file_path else '',
                 'file_path': file_path,
@@ -172,6 +222,18 @@ class DocumentProcessor:
                 'error': str(e)
             }
     
+    def _file_size(self, file_path: str) -> int:
+        """
+        Get a file's size with a single stat() call
+        
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        try:
+            return os.stat(file_path).st_size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+    
     def is_allowed_file(self, filename: str) -> bool:
         """
         Check if the file extension is allowed
@@ -185,13 +247,16 @@ class DocumentProcessor:
         if not filename:
             return False
         
-        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-        return extension in [ext.strip().lower() for ext in self.allowed_extensions]
+        dot = filename.rfind('.')
+        return dot >= 0 and filename[dot + 1:].lower() in self._allowed_ext
     
     def extract_text_from_pdf(self, file_path: str) -> str:
         """
         Extract text from PDF file using PyMuPDF (faster performance)
         
+        Pages with a text layer are read directly; pages without one that
+        carry images (scanned pages) are rendered and OCRed instead.
+        
         Args:
             file_path: Path to the PDF file
             
@@ -202,19 +267,34 @@ class DocumentProcessor:
             return "Sample PDF text content for simulation with $1,250.00 AUD total amount"
         
         try:
-            text = ""
-            pdf_document = fitz.open(file_path)
-            
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text() + "\n"
-            
-            pdf_document.close()
+            # Join the page texts once instead of growing a string page by page
+            with fitz.open(file_path) as pdf_document:
+                text = "\n".join(self._extract_pdf_page_text(page) for page in pdf_document)
             return text.strip()
         except Exception as e:
-            self.logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
+            self.logger.error("Error extracting text from PDF %s: %s", file_path, e)
             raise
     
+    def _extract_pdf_page_text(self, page) -> str:
+        """Return a PDF page's text layer, or its OCR text if the page is a scanned image"""
+        if self.pdf_text_mode == 'blocks':
+            # Text blocks (type 0, not images) sorted top to bottom, then left to right
+            text = "".join(block[4] for block in page.get_text("blocks", sort=True) if block[6] == 0)
+        else:
+            text = page.get_text()
+        # Only a page that carries images can be a scan; blank pages stay blank
+        if len(text.strip()) >= self.pdf_ocr_min_chars or not page.get_images():
+            return text
+        
+        try:
+            pixmap = page.get_pixmap(dpi=_PDF_OCR_DPI, colorspace=fitz.csGRAY)
+            image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+            return self._ocr_image(image)
+        except Exception as e:
+            # One unreadable page shouldn't fail the rest of the document
+            self.logger.warning("OCR of PDF page %s failed: %s", page.number + 1, e)
+            return ""
+    
     def extract_text_from_image(self, file_path: str) -> str:
         """
         Extract text from image file using OCR
@@ -229,18 +309,50 @@ class DocumentProcessor:
             return "Sample OCR text content for simulation with €950.00 EUR invoice total"
         
         try:
-            image = Image.open(file_path)
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Use pytesseract to extract text
-            text = pytesseract.image_to_string(image, config='--psm 6')
-            return text.strip()
+            return self._ocr_image(Image.open(file_path)).strip()
         except Exception as e:
-            self.logger.error(f"Error extracting text from image {file_path}: {str(e)}")
+            self.logger.error("Error extracting text from image %s: %s", file_path, e)
             raise
     
+    def _ocr_image(self, image) -> str:
+        """OCR a PIL image with the shared Tesseract engine"""
+        return self._ocr_engine.image_to_string(image)
+    
+    def extract_text_from_images(self, file_paths: List[str]) -> List[str]:
+        """
+        Extract text from several image files with a single tesseract run
+        
+        The paths are listed in a text file, which tesseract reads as one
+        multi-page input, so process startup and language data loading are
+        paid once instead of per image. Tesseract ends each page's text with
+        a form feed, which splits the output back into one text per image.
+        
+        Args:
+            file_paths: Paths to single-page image files
+            
+        Returns:
+            list: Extracted text of each image, in input order
+            
+        Raises:
+            ValueError: If tesseract's output doesn't have one page per image
+        """
+        if USE_SIMULATION or not file_paths:
+            return [self.extract_text_from_image(file_path) for file_path in file_paths]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            list_file = write_image_list(os.path.join(temp_dir, 'images.txt'),
+                                         [os.path.abspath(file_path) for file_path in file_paths])
+            text = self._ocr_engine.list_to_string(list_file)
+        
+        pages = split_pages(text)
+        if len(pages) != len(file_paths):
+            raise ValueError(f"Tesseract returned {len(pages)} pages for {len(file_paths)} images")
+        return pages
+    
+    def close(self):
+        """Release the tesserocr API, if started"""
+        self._ocr_engine.close()
+    
     def extract_text_from_txt(self, file_path: str) -> str:
         """
         Extract text from plain text file
@@ -252,14 +364,20 @@ class DocumentProcessor:
             str: File content
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read().strip()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read().strip()
+            # Read once and decode in memory, so a non-UTF-8 file isn't read twice
+            with open(file_path, 'rb') as file:
+                raw = file.read()
+            try:
+                text = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                # Try with different encoding
+                text = raw.decode('latin-1')
+            # Same newline handling as reading in text mode
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text.strip()
         except Exception as e:
-            self.logger.error(f"Error reading text file {file_path}: {str(e)}")
+            self.logger.error("Error reading text file %s: %s", file_path, e)
             raise
     
     def extract_text_from_document(self, file_path: str, file_extension: str) -> str:
@@ -329,7 +447,7 @@ class DocumentProcessor:
         detected_currency = self.detect_currency_from_text(ocr_text)
         final_currency = detected_currency if detected_currency else self.default_currency
         
-        self.logger.info(f"Currency processing: detected='{detected_currency}', final='{final_currency}', default='{self.default_currency}'")
+        self.logger.info("Currency processing: detected='%s', final='%s', default='%s'", detected_currency, final_currency, self.default_currency)
         
         invoice_data = {
             'vendor_name': None,
@@ -348,37 +466,24 @@ class DocumentProcessor:
         }
         
         # Look for invoice number
-        invoice_patterns = [
-            r'invoice\s*#?\s*:?\s*([A-Z0-9\-]+)',
-            r'inv\.\s*#?\s*:?\s*([A-Z0-9\-]+)',
-            r'bill\s*#?\s*:?\s*([A-Z0-9\-]+)'
-        ]
-        
-        for pattern in invoice_patterns:
-            match = re.search(pattern, ocr_text, re.IGNORECASE)
+        for pattern in _INVOICE_NUMBER_PATTERNS:
+            match = pattern.search(ocr_text)
             if match:
                 invoice_data['invoice_number'] = match.group(1)
                 break
         
         # Look for dates
-        date_pattern = r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})'
-        dates = re.findall(date_pattern, ocr_text)
+        dates = _DATE_RE.findall(ocr_text)
         if dates:
             invoice_data['invoice_date'] = dates[0]  # First date found
             if len(dates) > 1:
                 invoice_data['due_date'] = dates[1]  # Second date might be due date
         
         # Look for total amount (currency-aware patterns)
-        amount_patterns = [
-            r'total\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
-            r'amount\s*due\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
-            r'balance\s*:?\s*[\$€£¥]?(\d+\.?\d*)',
-            r'[\$€£¥]\s*(\d+\.?\d*)\s*total',
-            r'(\d+\.?\d*)\s*' + final_currency  # Amount followed by currency code
-        ]
+        amount_patterns = _AMOUNT_PATTERNS + (_amount_with_code_re(final_currency),)
         
         for pattern in amount_patterns:
-            match = re.search(pattern, ocr_text, re.IGNORECASE)
+            match = pattern.search(ocr_text)
             if match:
                 try:
                     invoice_data['total_amount'] = float(match.group(1))
@@ -387,48 +492,52 @@ class DocumentProcessor:
                     continue
         
         # Look for vendor name (first line that's not a number or date)
-        lines = ocr_text.split('\n')
-        for line in lines[:5]:  # Check first 5 lines
+        # maxsplit stops splitting after the first 5 lines (the rest is one piece)
+        for line in ocr_text.split('\n', 5)[:5]:  # Check first 5 lines
             line = line.strip()
-            if line and not re.match(r'^\d+[\/\-]\d+[\/\-]\d+', line) and not re.match(r'^[\d\$\.\-\s€£¥]+$', line):
-                if len(line) > 3:  # Reasonable length for company name
-                    invoice_data['vendor_name'] = line
-                    break
+            # More than 3 characters is a reasonable length for a company name
+            if len(line) > 3 and not _VENDOR_REJECT_RE.match(line):
+                invoice_data['vendor_name'] = line
+                break
         
         return invoice_data
     
-    def process_document_by_id(self, doc_id: int) -> Dict[str, Any]:
+    def process_document_by_id(self, doc_id: int, use_cache: bool = True,
+                               doc: Optional[Dict[str, Any]] = None,
+                               extracted_text: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a document by its database ID
         
         Args:
             doc_id: Database ID of the document to process
+            use_cache: Reuse the results of a completed document with the same
+                file_hash instead of running OCR again
+            doc: The document's row, when the caller has just fetched it; saves
+                reading it from the database again
+            extracted_text: The document's text, when the caller has already
+                extracted it (see process_documents_by_id); skips extraction
             
         Returns:
             dict: Processing result with status and details
         """
+        start_time = time.perf_counter()
         try:
             # Get document from database
-            doc = self.db_manager.get_document(doc_id)
+            if doc is None:
+                doc = self.db_manager.get_document(doc_id)
             if not doc:
                 raise ValueError(f"Document {doc_id} not found in database")
             
-            self.logger.info(f"Starting processing for document ID {doc_id}: {doc['filename']}")
-            
-            # Update status to processing
-            self.db_manager.update_document(doc_id, status='processing')
+            self.logger.info("Starting processing for document ID %s: %s", doc_id, doc['filename'])
             
             # Validate file exists
             file_path = doc['file_path']
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
+            file_size = self._file_size(file_path)
             
             # Validate file
             if not self.is_allowed_file(doc['filename']):
                 raise ValueError(f"File type not allowed: {doc['filename']}")
             
-            # Get file size
-            file_size = os.path.getsize(file_path)
             if file_size > self.max_file_size:
                 raise ValueError(f"File too large: {file_size} bytes (max: {self.max_file_size})")
             
@@ -436,18 +545,36 @@ class DocumentProcessor:
             filename = doc['filename']
             file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
             
-            # Phase 1 Processing Steps:
-            # 1. Extract text from document (OCR for images, text extraction for PDFs)
-            self.logger.info(f"Extracting text from {filename} (type: {file_extension})")
-            ocr_text = self.extract_text_from_document(file_path, file_extension)
+            # Identical content was already processed: reuse its results and skip OCR
+            cached = None
+            if use_cache and doc.get('file_hash'):
+                cached = self.db_manager.get_completed_document_by_hash(doc['file_hash'], exclude_id=doc_id)
             
-            # 2. Parse invoice data from extracted text
-            self.logger.info("Parsing invoice data from extracted text")
-            extracted_data = self.parse_invoice_data(ocr_text)
+            if cached:
+                self.logger.info("Reusing results of document ID %s with identical content", cached['id'])
+                ocr_text = cached['ocr_text'] or ''
+                extracted_data = json.loads(cached['extracted_data'])
+            else:
+                # Only text extraction is slow enough for the status to be seen;
+                # validation failures and reused results never publish it
+                if self.publish_intermediate_state:
+                    self.db_manager.update_document(doc_id, status='processing')
+                
+                # Phase 1 Processing Steps:
+                # 1. Extract text from document (OCR for images, text extraction for PDFs)
+                if extracted_text is None:
+                    self.logger.info("Extracting text from %s (type: %s)", filename, file_extension)
+                    ocr_text = self.extract_text_from_document(file_path, file_extension)
+                else:
+                    ocr_text = extracted_text
+                
+                # 2. Parse invoice data from extracted text
+                self.logger.info("Parsing invoice data from extracted text")
+                extracted_data = self.parse_invoice_data(ocr_text)
             
             # Log currency processing results
-            currency_info = f"Currency: {extracted_data['currency']} ({'detected' if extracted_data['currency_detected'] else 'default'})"
-            self.logger.info(currency_info)
+            self.logger.info("Currency: %s (%s)", extracted_data['currency'],
+                             'detected' if extracted_data['currency_detected'] else 'default')
             
             # 3. Save extracted data to database (Phase 1 complete here)
             self.logger.info("Saving extracted data to database")
@@ -455,17 +582,19 @@ class DocumentProcessor:
                 doc_id,
                 status='completed',
                 processed_date=datetime.now(),
-                extracted_data=json.dumps(extracted_data),
+                extracted_data=to_json(extracted_data),
                 ocr_text=ocr_text
             )
             
-            self.logger.info(f"Successfully processed document ID {doc_id}: {doc['filename']}")
+            self.logger.info("Successfully processed document ID %s: %s", doc_id, doc['filename'])
+            self.db_manager.record_processing(True, time.perf_counter() - start_time)
             
             return {
                 'success': True,
                 'document_id': doc_id,
                 'data': extracted_data,
                 'ocr_text_length': len(ocr_text),
+                'reused_from_document_id': cached['id'] if cached else None,
                 'simulation_mode': USE_SIMULATION,
                 'currency_info': {
                     'currency': extracted_data['currency'],
@@ -480,7 +609,7 @@ class DocumentProcessor:
         except Exception as e:
             # Update document status to failed
             error_msg = str(e)
-            self.logger.error(f"Error processing document ID {doc_id}: {error_msg}")
+            self.logger.error("Error processing document ID %s: %s", doc_id, error_msg)
             
             try:
                 self.db_manager.update_document(
@@ -490,7 +619,8 @@ class DocumentProcessor:
                     processed_date=datetime.now()
                 )
             except Exception as db_error:
-                self.logger.error(f"Failed to update document status to failed: {db_error}")
+                self.logger.error("Failed to update document status to failed: %s", db_error)
+            self.db_manager.record_processing(False, time.perf_counter() - start_time)
             
             return {
                 'success': False,
@@ -500,6 +630,96 @@ class DocumentProcessor:
                 'message': f"Failed to process document: {error_msg}"
             }
     
+    def process_documents_by_id(self, doc_ids: List[int], use_cache: bool = True,
+                                max_workers: Optional[int] = None,
+                                use_processes: bool = False) -> List[Dict[str, Any]]:
+        """
+        Process several documents by database ID at once
+        
+        Each document runs through process_document_by_id() on a pool of
+        workers. Threads overlap one document's OCR with another's file reads
+        and database writes, but in-process work (tesserocr, PDF parsing,
+        invoice parsing) still takes turns on the GIL and the single tesserocr
+        API. With use_processes, each worker process builds its own
+        DocumentProcessor and database connection, so that work runs on every
+        core; workers read their settings from the config file, so unsaved
+        changes to the config are not seen.
+        
+        Args:
+            doc_ids: Database IDs of the documents to process
+            use_cache: Passed on to process_document_by_id()
+            max_workers: Documents processed at once (default: the CPU count)
+            use_processes: Use a process pool instead of a thread pool
+            
+        Returns:
+            list: One processing result per document, in input order
+        """
+        if not doc_ids:
+            return []
+        workers = min(max_workers or os.cpu_count() or 1, len(doc_ids))
+        if use_processes:
+            # Connections can't cross a fork; each worker opens its own. Workers
+            # load the config files by path rather than unpickling live Configs
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_processor,
+                                     initargs=(self.config.config_file,
+                                               self.db_manager.config.config_file)) as pool:
+                return list(pool.map(_process_in_worker, doc_ids, [use_cache] * len(doc_ids)))
+        
+        docs, texts = {}, {}
+        if not tesseract_engine.TESSEROCR_AVAILABLE and not USE_SIMULATION:
+            docs, texts = self._ocr_images_together(doc_ids, use_cache)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                lambda doc_id: self.process_document_by_id(doc_id, use_cache, doc=docs.get(doc_id),
+                                                           extracted_text=texts.get(doc_id)),
+                doc_ids
+            ))
+    
+    def _ocr_images_together(self, doc_ids: List[int], use_cache: bool):
+        """
+        Fetch the documents and OCR the images among them with one tesseract run
+        
+        Images that fail validation (type not allowed, missing or too large)
+        or whose results will be reused from a duplicate are left out.
+        If the batched run fails, no texts are returned and each image is
+        OCRed on its own by process_document_by_id().
+        
+        Returns:
+            tuple: (document rows by ID, extracted text by ID)
+        """
+        docs = {}
+        image_ids = []
+        for doc_id in dict.fromkeys(doc_ids):
+            doc = self.db_manager.get_document(doc_id)
+            if not doc:
+                continue
+            docs[doc_id] = doc
+            filename = doc['filename']
+            if filename.rsplit('.', 1)[-1].lower() not in _BATCH_OCR_EXTENSIONS:
+                continue
+            # Files process_document_by_id() will reject stay out of the run,
+            # so one missing path can't fail the whole batch
+            if not self.is_allowed_file(filename):
+                continue
+            try:
+                if os.stat(doc['file_path']).st_size > self.max_file_size:
+                    continue
+            except OSError:
+                continue
+            if use_cache and doc.get('file_hash') and self.db_manager.get_completed_document_by_hash(
+                    doc['file_hash'], exclude_id=doc_id):
+                continue
+            image_ids.append(doc_id)
+        
+        if len(image_ids) < 2:
+            return docs, {}
+        try:
+            texts = self.extract_text_from_images([docs[doc_id]['file_path'] for doc_id in image_ids])
+        except Exception as e:
+            self.logger.warning("Batched image OCR failed, OCRing images one at a time: %s", e)
+            return docs, {}
+        return docs, dict(zip(image_ids, texts))
+    
     def process_document(self, file_path: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Process a document file (legacy method - kept for backward compatibility)
@@ -514,11 +734,8 @@ class DocumentProcessor:
         self.logger.warning("process_document(file_path) is deprecated. Use process_document_by_id(doc_id) instead.")
         
         try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-            
             # Get file info
-            file_size = os.path.getsize(file_path)
+            file_size = self._file_size(file_path)
             filename = os.path.basename(file_path)
             
             # Validate file
@@ -539,7 +756,7 @@ class DocumentProcessor:
                 'simulation_mode': USE_SIMULATION
             }
             
-            self.logger.info(f"Processing document: {filename}")
+            self.logger.info("Processing document: %s", filename)
             
             # Extract text and parse data
             file_extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
@@ -552,7 +769,7 @@ class DocumentProcessor:
             processing_data['extracted_data'] = extracted_data
             processing_data['ocr_text'] = ocr_text
             
-            self.logger.info(f"Successfully processed document: {filename}")
+            self.logger.info("Successfully processed document: %s", filename)
             return {
                 'success': True,
                 'data': processing_data,
@@ -560,7 +777,7 @@ class DocumentProcessor:
             }
             
         except Exception as e:
-            self.logger.error(f"Error processing document {file_path}: {str(e)}")
+            self.logger.error("Error processing document %s: %s", file_path, e)
             return {
                 'success': False,
                 'error': str(e),
@@ -588,7 +805,7 @@ class DocumentProcessor:
                     'message': 'Database lookup not implemented'
                 }
         except Exception as e:
-            self.logger.error(f"Error getting document status: {str(e)}")
+            self.logger.error("Error getting document status: %s", e)
             return {
                 'error': str(e),
                 'status': 'error'
@@ -611,7 +828,7 @@ class DocumentProcessor:
             else:
                 return []
         except Exception as e:
-            self.logger.error(f"Error listing documents: {str(e)}")
+            self.logger.error("Error listing documents: %s", e)
             return []
     
     def delete_document(self, document_id: str) -> Dict[str, Any]:
@@ -638,7 +855,7 @@ class DocumentProcessor:
                     'message': 'Document deletion not implemented'
                 }
         except Exception as e:
-            self.logger.error(f"Error deleting document: {str(e)}")
+            self.logger.error("Error deleting document: %s", e)
             return {
                 'success': False,
                 'error': str(e)
@@ -655,9 +872,25 @@ class DocumentProcessor:
             dict: Cleanup result
         """
         try:
-            # TODO: Implement file cleanup logic
+            cutoff = time.time() - days_old * 86400
+            # scandir's entries know their type from the directory listing, so
+            # only regular files need the stat() for their modification time
+            try:
+                with os.scandir(self.upload_folder) as entries:
+                    stale = [entry.path for entry in entries
+                             if entry.is_file(follow_symlinks=False)
+                             and entry.stat(follow_symlinks=False).st_mtime < cutoff]
+            except FileNotFoundError:
+                stale = []
+            
             cleaned_count = 0
-            self.logger.info(f"File cleanup completed. Removed {cleaned_count} files older than {days_old} days")
+            for path in stale:
+                try:
+                    os.unlink(path)
+                    cleaned_count += 1
+                except FileNotFoundError:
+                    pass
+            self.logger.info("File cleanup completed. Removed %s files older than %s days", cleaned_count, days_old)
             
             return {
                 'success': True,
@@ -665,8 +898,24 @@ class DocumentProcessor:
                 'message': f"Cleanup completed. Removed {cleaned_count} files"
             }
         except Exception as e:
-            self.logger.error(f"Error during cleanup: {str(e)}")
+            self.logger.error("Error during cleanup: %s", e)
             return {
                 'success': False,
                 'error': str(e)
             }
+
+
+# DocumentProcessor of the current process_documents_by_id() worker process
+_worker_processor = None
+
+
+def _init_worker_processor(config_file: str, db_config_file: str):
+    """Process pool initializer: build this worker's processor and database manager"""
+    global _worker_processor
+    _worker_processor = DocumentProcessor(Config.instance(config_file),
+                                          DatabaseManager(Config.instance(db_config_file)))
+
+
+def _process_in_worker(doc_id: int, use_cache: bool) -> Dict[str, Any]:
+    """Process one document with this worker's processor"""
+    return _worker_processor.process_document_by_id(doc_id, use_cache)
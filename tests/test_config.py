@@ -0,0 +1,200 @@
+# tests/test_config.py
+"""
+Test suite for configuration management.
+Tests config.ini loading, default creation and the Paperless-ngx handler.
+"""
+
+import configparser
+import os
+import tempfile
+
+import pytest
+
+from config.parser import FastConfigParser, parse_config, parse_csv_tags
+from config.settings import Config
+
+
+class TestConfig:
+    """Test Config loading and the Paperless-ngx settings handler"""
+
+    @pytest.fixture
+    def config_path(self):
+        """Path to a config.ini inside a fresh temporary directory"""
+        return os.path.join(tempfile.mkdtemp(), 'config', 'config.ini')
+
+    def test_default_config_created(self, config_path):
+        """Test a default config.ini is written when none exists"""
+        config = Config(config_path)
+
+        assert os.path.exists(config_path)
+        assert config.get('database', 'type') == 'sqlite'
+        assert config.getint('ocr', 'dpi') == 300
+        assert config.getboolean('extended', 'enabled') is False
+
+    def test_paperless_handler_is_lazy(self, config_path):
+        """Test the Paperless handler is only built when first used"""
+        config = Config(config_path)
+        assert config._paperless_config_handler is None
+
+        config.get_invoice_tags()
+        assert config._paperless_config_handler is config.paperless_config_handler
+
+    def test_paperless_tags_cached(self, config_path):
+        """Test tag lists are parsed once, returned as lists and refreshed on set()"""
+        config = Config(config_path)
+
+        tags = config.get_invoice_tags()
+        assert tags == ['Invoice', 'ProcessedByMiddleware']
+        tags.append('Changed')
+        assert config.get_invoice_tags() == ['Invoice', 'ProcessedByMiddleware']
+        assert config.get_receipt_tags() == ['Receipt', 'ProcessedByMiddleware']
+
+        config.set('paperless', 'invoice_tags', ' Bill , ,Expense ')
+        assert config.get_invoice_tags() == ['Bill', 'Expense']
+
+    def test_paperless_api_settings(self, config_path):
+        """Test API url/token are refreshed after the config is reloaded"""
+        config = Config(config_path)
+        assert config.get_paperless_api_url() == 'http://paperless-ngx:8000/api/'
+
+        config.set('paperless', 'api_url', 'http://localhost:8000/api/')
+        config.save()
+        config.load_config()
+        assert config.get_paperless_api_url() == 'http://localhost:8000/api/'
+
+    def test_lookup_cache(self, config_path):
+        """Test cached lookups stay in sync with set() and honour fallbacks"""
+        config = Config(config_path)
+
+        assert config.getint('ocr', 'dpi') == 300
+        config.set('ocr', 'dpi', '150')
+        assert config.getint('ocr', 'dpi') == 150
+        assert config.get('OCR', 'dpi', 'none') == 'none'
+        assert config.get('ocr', 'DPI') == '150'
+        assert config.getint('ocr', 'missing', 5) == 5
+        assert config.getboolean('web_interface', 'debug') is False
+
+    def test_list_settings_presplit(self, config_path):
+        """Test comma-separated settings are exposed as frozensets"""
+        config = Config(config_path)
+
+        assert config.get_set('processing', 'allowed_extensions') == {'pdf', 'png', 'jpg', 'jpeg', 'tiff'}
+        assert 'EUR' in config.get_set('currency', 'supported')
+        assert config.get_set('processing', 'missing', 'a, b') == {'a', 'b'}
+
+        config.set('processing', 'allowed_extensions', 'pdf, txt')
+        assert config.get_set('processing', 'allowed_extensions') == {'pdf', 'txt'}
+
+    def test_instance_is_shared(self, config_path):
+        """Test Config.instance() parses each config file only once"""
+        config = Config.instance(config_path)
+
+        assert Config.instance(config_path) is config
+        assert Config.instance(os.path.join(tempfile.mkdtemp(), 'config.ini')) is not config
+
+    def test_save_replaces_file(self, config_path):
+        """Test save() writes through a temporary file and leaves none behind"""
+        config = Config(config_path)
+        config.set('ocr', 'dpi', 150)
+        config.save()
+
+        assert not os.path.exists(config_path + '.tmp')
+        assert Config(config_path).getint('ocr', 'dpi') == 150
+
+    def test_reload_skips_unchanged_file(self, config_path):
+        """Test reload() only re-parses config.ini after it changes on disk"""
+        config = Config(config_path)
+        parsed = config.config
+
+        config.reload()
+        assert config.config is parsed
+
+        config.set('ocr', 'dpi', 150)
+        config.reload()
+        assert config.getint('ocr', 'dpi') == 300
+
+        with open(config_path, 'a') as f:
+            f.write('[extra]\nkey = value\n')
+        config.reload()
+        assert config.get('extra', 'key') == 'value'
+
+    def test_load_empty_file(self, config_path):
+        """Test an existing but empty config.ini loads without sections"""
+        os.makedirs(os.path.dirname(config_path))
+        open(config_path, 'w').close()
+
+        config = Config(config_path)
+        assert config.get('database', 'type', 'sqlite') == 'sqlite'
+
+    def test_bad_interpolation_only_fails_its_key(self, config_path):
+        """Test a value with a lone '%' loads and only raises when that key is read"""
+        os.makedirs(os.path.dirname(config_path))
+        with open(config_path, 'w') as f:
+            f.write("[paperless]\napi_url = http://paperless/api/\napi_token = abc%2Fdef\n"
+                    "[ocr]\ndpi = 300\nquality = 100%%\n")
+
+        config = Config(config_path)
+
+        assert isinstance(config.config, configparser.ConfigParser)
+        assert config.get('paperless', 'api_url') == 'http://paperless/api/'
+        assert config.getint('ocr', 'dpi') == 300
+        assert config.get('ocr', 'quality') == '100%'
+        with pytest.raises(configparser.InterpolationSyntaxError):
+            config.get('paperless', 'api_token')
+
+
+class TestFastConfigParser:
+    """Test the regex-based config.ini parser"""
+
+    SAMPLE = (
+        "# Middleware configuration\n"
+        "[database]\n"
+        "type = sqlite\n"
+        "Path=data/middleware.db\n"
+        "\n"
+        "; comment\n"
+        "[paperless]\n"
+        "api_url = http://paperless-ngx:8000/api/?a=b\n"
+        "invoice_tags =\n"
+    )
+
+    def test_matches_configparser(self):
+        """Test the fast path yields the same values as configparser"""
+        fast = parse_config(self.SAMPLE)
+        reference = configparser.ConfigParser()
+        reference.read_string(self.SAMPLE)
+
+        assert isinstance(fast, FastConfigParser)
+        assert fast.sections() == reference.sections()
+        for section in reference.sections():
+            assert fast.items(section) == reference.items(section)
+
+    def test_lookup_semantics(self):
+        """Test fallbacks and missing keys behave like configparser"""
+        parser = parse_config(self.SAMPLE)
+
+        assert parser.get('database', 'PATH') == 'data/middleware.db'
+        assert parser.get('database', 'missing', fallback='x') == 'x'
+        assert parser.getint('ocr', 'dpi', fallback=300) == 300
+        with pytest.raises(configparser.NoSectionError):
+            parser.get('ocr', 'dpi')
+        with pytest.raises(configparser.NoOptionError):
+            parser.get('database', 'missing')
+
+    @pytest.mark.parametrize('text', [
+        "[a]\nhome = /srv\npath = %(home)s/data\n",
+        "[a]\nkey = first\n  second\n",
+        "[a]\nkey: value\n",
+        "[DEFAULT]\nkey = value\n",
+    ])
+    def test_falls_back_to_configparser(self, text):
+        """Test syntax outside the fast path is handed to configparser"""
+        assert isinstance(parse_config(text), configparser.ConfigParser)
+
+    @pytest.mark.parametrize('text', [
+        '', ',', 'Invoice', ' Invoice , ProcessedByMiddleware ', 'a,,b,', '\tTax Invoice\t,  ,x',
+    ])
+    def test_parse_csv_tags(self, text):
+        """Test the tag scanner matches split/strip semantics"""
+        expected = tuple(t.strip() for t in text.split(',') if t.strip())
+        assert parse_csv_tags(text) == expected
@@ -3,6 +3,11 @@ from datetime import datetime
 import os
 import tempfile
 import pytest # Import pytest for the fixture decorator
+import threading
+from unittest.mock import Mock, patch
+
+from database import connection
+from database.connection import DatabaseManager
 
 class TestDatabaseOperations:
     # Removed setup_method and teardown_method as the new test_delete_document
@@ -134,6 +139,161 @@ class TestDatabaseOperations:
             conn.close()
 
 
+class TestDatabaseManager:
+    """Test DatabaseManager against a temporary SQLite file"""
+
+    @pytest.fixture
+    def db_manager(self):
+        db_path = os.path.join(tempfile.mkdtemp(), 'middleware.db')
+        manager = DatabaseManager(Mock(get=Mock(return_value=db_path)))
+        yield manager
+        manager.close()
+
+    def test_connection_reused_per_thread(self, db_manager):
+        """Test calls in one thread share a connection and other threads get their own"""
+        with db_manager.get_connection() as first, db_manager.get_connection() as second:
+            assert first is second
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db_manager.execute_query("SELECT 1")[0][0]))
+        thread.start()
+        thread.join()
+        assert other == [1]
+
+    def test_forked_process_opens_own_connection(self, db_manager):
+        """Test a connection inherited across fork() is not reused by the child"""
+        with db_manager.get_connection() as parent:
+            pass
+
+        with patch.object(os, 'getpid', return_value=os.getpid() + 1):
+            with db_manager.get_connection() as child:
+                assert child is not parent
+            db_manager.close()
+
+        parent.execute("SELECT 1")  # The parent's connection was left open
+        parent.close()
+
+    def test_store_and_update_document(self, db_manager):
+        """Test writes are committed and visible through the reused connection"""
+        doc_id = db_manager.store_document({'filename': 'a.pdf', 'file_path': '/tmp/a.pdf', 'bogus': 1})
+        assert db_manager.update_document(doc_id, status='completed')
+
+        db_manager.close()
+        assert db_manager.get_document(doc_id)['status'] == 'completed'
+
+    def test_insert_sql_built_once_per_column_set(self, db_manager):
+        """Test repeated inserts with the same columns reuse one INSERT statement"""
+        connection._insert_document_sql.cache_clear()
+        for name in ('a.pdf', 'b.pdf'):
+            db_manager.store_document({'filename': name, 'file_path': '/' + name})
+        db_manager.store_documents([{'filename': 'c.pdf', 'file_path': '/c'}])
+
+        info = connection._insert_document_sql.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+        assert connection._insert_document_sql(('filename',)) == "INSERT INTO documents (filename) VALUES (?)"
+
+    def test_update_sql_built_once_per_column_set(self, db_manager):
+        """Test updates reuse one statement per field set and return False without fields"""
+        doc_id = db_manager.store_document({'filename': 'a.pdf', 'file_path': '/a'})
+        connection._update_document_sql.cache_clear()
+        assert db_manager.update_document(doc_id, status='processing', vendor='ACME')
+        assert db_manager.update_document(doc_id, status='completed', vendor='ACME')
+        assert not db_manager.update_document(doc_id)
+        assert not db_manager.update_document(doc_id + 1, status='failed')
+
+        info = connection._update_document_sql.cache_info()
+        assert (info.misses, info.hits) == (2, 1)
+        assert db_manager.get_document(doc_id)['status'] == 'completed'
+
+    def test_store_documents_in_one_transaction(self, db_manager):
+        """Test a bulk insert returns the ids in row order and keeps column defaults"""
+        rows = [
+            {'filename': 'a.pdf', 'file_path': '/a'},
+            {'filename': 'b.pdf', 'file_path': '/b', 'status': 'completed'},
+            {'filename': 'c.pdf', 'file_path': '/c', 'bogus': 1},
+        ]
+        with patch.object(db_manager, 'get_connection', wraps=db_manager.get_connection) as get_connection:
+            ids = db_manager.store_documents(rows)
+
+        assert get_connection.call_count == 1
+        assert [db_manager.get_document(i)['filename'] for i in ids] == ['a.pdf', 'b.pdf', 'c.pdf']
+        assert [db_manager.get_document(i)['status'] for i in ids] == ['pending', 'completed', 'pending']
+        assert db_manager.store_documents([]) == []
+
+    def test_get_stats_counts_by_status(self, db_manager):
+        """Test document counts per status come from a single query"""
+        assert db_manager.get_stats() == {
+            'total_documents': 0, 'processed_documents': 0, 'failed_documents': 0, 'pending_documents': 0,
+        }
+        db_manager.store_documents([
+            {'filename': name, 'file_path': '/' + name, 'status': status}
+            for name, status in [('a', 'completed'), ('b', 'completed'), ('c', 'failed'),
+                                 ('d', 'pending'), ('e', 'processing'), ('f', None)]
+        ])
+
+        with patch.object(db_manager, 'execute_query', wraps=db_manager.execute_query) as query:
+            stats = db_manager.get_stats()
+
+        assert query.call_count == 1
+        assert stats == {
+            'total_documents': 6, 'processed_documents': 2, 'failed_documents': 1, 'pending_documents': 1,
+        }
+
+    def test_document_listing_and_stats_use_indexes(self, db_manager):
+        """Test list_documents() and get_stats() read indexes instead of sorting the table"""
+        def plan(query):
+            return ' '.join(row[-1] for row in db_manager.execute_query("EXPLAIN QUERY PLAN " + query))
+
+        listing = plan("SELECT * FROM documents ORDER BY upload_date DESC LIMIT 10 OFFSET 0")
+        assert 'idx_documents_upload_date' in listing and 'TEMP B-TREE' not in listing
+        assert 'idx_documents_status' in plan("SELECT status, COUNT(*) FROM documents GROUP BY status")
+        by_status = plan("SELECT * FROM documents WHERE status = 'pending' ORDER BY upload_date DESC LIMIT 10")
+        assert 'idx_documents_status_upload_date' in by_status and 'TEMP B-TREE' not in by_status
+        assert 'idx_extracted_data_document' in plan("SELECT * FROM extracted_data WHERE document_id = 1")
+
+    def test_record_processing_upserts_daily_row(self, db_manager):
+        """Test processing stats accumulate in one row per day"""
+        db_manager.record_processing(True, 2.0)
+        db_manager.record_processing(True, 1.0)
+        db_manager.record_processing(False, 3.0)
+
+        assert db_manager.execute_query("SELECT COUNT(*) FROM processing_stats")[0][0] == 1
+        stats = db_manager.get_processing_stats()
+        assert stats['documents_processed'] == 3
+        assert stats['successful_extractions'] == 2
+        assert stats['failed_extractions'] == 1
+        assert stats['avg_processing_time'] == 2.0
+
+    def test_migrates_older_schema(self):
+        """Test databases created by the SQL migrations gain the new columns"""
+        db_path = os.path.join(tempfile.mkdtemp(), 'middleware.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT, file_path TEXT, status TEXT)")
+        conn.execute("CREATE TABLE processing_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE, "
+                     "documents_processed INTEGER DEFAULT 0, successful_extractions INTEGER DEFAULT 0, "
+                     "failed_extractions INTEGER DEFAULT 0)")
+        conn.execute("CREATE INDEX idx_processing_stats_date ON processing_stats(date)")
+        conn.commit()
+        conn.close()
+
+        db_manager = DatabaseManager(Mock(get=Mock(return_value=db_path)))
+        db_manager.store_document({'filename': 'a.pdf', 'file_path': '/a', 'file_hash': 'f00'})
+        db_manager.record_processing(True, 1.5)
+        db_manager.record_processing(True, 0.5)
+
+        assert db_manager.get_processing_stats()['avg_processing_time'] == 1.0
+        db_manager.close()
+
+    def test_error_rolls_back(self, db_manager):
+        """Test a failed statement leaves no uncommitted changes on the shared connection"""
+        with pytest.raises(sqlite3.OperationalError):
+            with db_manager.get_connection() as conn:
+                conn.execute("INSERT INTO documents (filename, file_path) VALUES ('a.pdf', '/a')")
+                conn.execute("SELECT missing FROM documents")
+
+        assert db_manager.execute_query("SELECT COUNT(*) FROM documents")[0][0] == 0
+
+
 # Also, update the test_db fixture to ensure it creates tables with CASCADE:
 @pytest.fixture(scope="function")
 def test_db():
@@ -0,0 +1,472 @@
+# tests/test_document_processor.py
+"""
+Test suite for the document processor.
+Runs process_document_by_id against a temporary SQLite database.
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from config.settings import Config
+from core import tesseract_engine
+from database.connection import DatabaseManager
+from processing import document_processor
+from processing.document_processor import USE_SIMULATION, DocumentProcessor
+
+
+class TestProcessDocumentById:
+    """Test document processing through the database"""
+
+    @pytest.fixture
+    def workdir(self):
+        return tempfile.mkdtemp()
+
+    @pytest.fixture
+    def db_manager(self, workdir):
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('database', 'path', os.path.join(workdir, 'middleware.db'))
+        manager = DatabaseManager(config)
+        yield manager
+        manager.close()
+
+    @pytest.fixture
+    def processor(self, workdir, db_manager):
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        config.set('processing', 'allowed_extensions', 'pdf,txt')
+        return DocumentProcessor(config, db_manager)
+
+    def store_txt(self, workdir, db_manager, name, file_hash='abc123'):
+        path = os.path.join(workdir, name)
+        with open(path, 'w') as f:
+            f.write('Invoice #: INV-7\nTotal: $12.50\n')
+        return db_manager.store_document({
+            'filename': name, 'file_path': path, 'status': 'pending', 'file_hash': file_hash,
+        })
+
+    def test_upload_folder_left_to_upload_routes(self, workdir, processor):
+        """Test constructing a processor does not create the upload folder"""
+        assert processor.upload_folder == os.path.join(workdir, 'uploads')
+        assert not os.path.exists(processor.upload_folder)
+
+    def test_cleanup_old_files(self, workdir, processor):
+        """Test only regular files older than the cutoff are removed from the upload folder"""
+        assert processor.cleanup_old_files()['cleaned_count'] == 0
+        os.makedirs(os.path.join(processor.upload_folder, 'subdir'))
+        old_time = time.time() - 40 * 86400
+        for name in ('old.pdf', 'new.pdf'):
+            with open(os.path.join(processor.upload_folder, name), 'w') as f:
+                f.write('scan')
+        os.utime(os.path.join(processor.upload_folder, 'old.pdf'), (old_time, old_time))
+        os.utime(os.path.join(processor.upload_folder, 'subdir'), (old_time, old_time))
+        os.symlink(os.path.join(processor.upload_folder, 'old.pdf'), os.path.join(processor.upload_folder, 'link.pdf'))
+
+        result = processor.cleanup_old_files(days_old=30)
+
+        assert result['success'] and result['cleaned_count'] == 1
+        assert sorted(os.listdir(processor.upload_folder)) == ['link.pdf', 'new.pdf', 'subdir']
+
+    def test_identical_content_reuses_results(self, workdir, db_manager, processor):
+        """Test a document whose hash matches a completed one skips text extraction"""
+        first_id = self.store_txt(workdir, db_manager, 'first.txt')
+        first = processor.process_document_by_id(first_id)
+        assert first['success'] and first['reused_from_document_id'] is None
+
+        second_id = self.store_txt(workdir, db_manager, 'second.txt')
+        with patch.object(processor, 'extract_text_from_document') as extract:
+            second = processor.process_document_by_id(second_id)
+
+        extract.assert_not_called()
+        assert second['reused_from_document_id'] == first_id
+        assert second['data'] == first['data']
+        assert db_manager.get_processing_stats()['successful_extractions'] == 2
+        stored = db_manager.get_document(second_id)
+        assert stored['status'] == 'completed'
+        assert json.loads(stored['extracted_data']) == first['data']
+
+    def test_documents_written_in_one_update(self, workdir, db_manager, processor):
+        """Test each document is written once unless intermediate state is published"""
+        processor.process_document_by_id(self.store_txt(workdir, db_manager, 'first.txt'))
+        second_id = self.store_txt(workdir, db_manager, 'second.txt')
+
+        with patch.object(db_manager, 'update_document', wraps=db_manager.update_document) as update:
+            processor.process_document_by_id(second_id, use_cache=False)
+            assert [c.kwargs['status'] for c in update.call_args_list] == ['completed']
+
+            processor.publish_intermediate_state = True
+            update.reset_mock()
+            processor.process_document_by_id(second_id)
+            assert [c.kwargs['status'] for c in update.call_args_list] == ['completed']
+
+            update.reset_mock()
+            processor.process_document_by_id(second_id, use_cache=False)
+            assert [c.kwargs['status'] for c in update.call_args_list] == ['processing', 'completed']
+
+    def test_cache_bypassed_when_disabled(self, workdir, db_manager, processor):
+        """Test use_cache=False always extracts the text again"""
+        processor.process_document_by_id(self.store_txt(workdir, db_manager, 'first.txt'))
+        second_id = self.store_txt(workdir, db_manager, 'second.txt')
+
+        with patch.object(processor, 'extract_text_from_document',
+                          return_value='Total: $1.00') as extract:
+            result = processor.process_document_by_id(second_id, use_cache=False)
+
+        extract.assert_called_once()
+        assert result['reused_from_document_id'] is None
+
+
+    def test_prefetched_document_not_read_again(self, workdir, db_manager, processor):
+        """Test a row passed in by the caller replaces the get_document() lookup"""
+        doc_id = self.store_txt(workdir, db_manager, 'first.txt')
+        doc = db_manager.get_document(doc_id)
+
+        with patch.object(db_manager, 'get_document') as get_document:
+            result = processor.process_document_by_id(doc_id, use_cache=False, doc=doc)
+
+        get_document.assert_not_called()
+        assert result['success'] and result['data']['invoice_number'] == 'INV-7'
+
+    def test_process_documents_by_id(self, workdir, db_manager, processor):
+        """Test a batch is processed on worker threads and returned in input order"""
+        doc_ids = [self.store_txt(workdir, db_manager, f'doc{i}.txt', file_hash=f'hash{i}') for i in range(4)]
+        threads = set()
+        extract = processor.extract_text_from_document
+
+        def tracking_extract(*args):
+            threads.add(threading.get_ident())
+            return extract(*args)
+
+        with patch.object(processor, 'extract_text_from_document', side_effect=tracking_extract):
+            results = processor.process_documents_by_id(doc_ids + [doc_ids[-1] + 100], max_workers=2)
+
+        assert [r['document_id'] for r in results] == doc_ids + [doc_ids[-1] + 100]
+        assert [r['success'] for r in results] == [True] * 4 + [False]
+        assert threads and threading.get_ident() not in threads
+        assert all(db_manager.get_document(doc_id)['status'] == 'completed' for doc_id in doc_ids)
+        assert processor.process_documents_by_id([]) == []
+
+    def test_process_documents_by_id_in_processes(self, workdir, db_manager, processor):
+        """Test worker processes open their own database and return results in input order"""
+        doc_ids = [self.store_txt(workdir, db_manager, f'doc{i}.txt', file_hash=f'hash{i}') for i in range(3)]
+        # Workers load the config by path, so the settings have to be on disk
+        processor.config.set('database', 'path', db_manager.db_path)
+        processor.config.save()
+
+        with patch.object(document_processor, 'ProcessPoolExecutor',
+                          wraps=document_processor.ProcessPoolExecutor) as pool:
+            results = processor.process_documents_by_id(doc_ids, max_workers=2, use_processes=True)
+
+        assert pool.call_args.kwargs['initargs'] == (processor.config.config_file,) * 2
+
+        assert [r['document_id'] for r in results] == doc_ids
+        assert all(r['success'] and r['data']['invoice_number'] == 'INV-7' for r in results)
+        assert all(db_manager.get_document(doc_id)['status'] == 'completed' for doc_id in doc_ids)
+        assert db_manager.get_processing_stats()['successful_extractions'] == 3
+
+    def test_images_in_a_batch_ocred_together(self, workdir, db_manager, processor):
+        """Test a batch's images go through one tesseract run, split on its page breaks"""
+        if USE_SIMULATION:
+            pytest.skip('text extraction is simulated without the OCR libraries')
+        doc_ids = []
+        for i, name in enumerate(['a.png', 'b.txt', 'c.jpg', 'd.png']):
+            path = os.path.join(workdir, name)
+            with open(path, 'w') as f:
+                f.write('Invoice #: TXT-1\n')
+            doc_ids.append(db_manager.store_document({'filename': name, 'file_path': path,
+                                                      'status': 'pending', 'file_hash': f'hash{i}'}))
+        listed = []
+
+        def image_to_string(list_file, config):
+            with open(list_file) as f:
+                listed.extend(f.read().split())
+            return 'Invoice #: IMG-1\n\x0cInvoice #: IMG-2\n\x0cInvoice #: IMG-3\n\x0c'
+
+        with patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', False), \
+             patch.object(tesseract_engine, 'pytesseract', create=True) as pytesseract, \
+             patch.object(processor, '_allowed_ext', frozenset(('png', 'jpg', 'txt'))):
+            pytesseract.image_to_string.side_effect = image_to_string
+            results = processor.process_documents_by_id(doc_ids)
+
+            pytesseract.image_to_string.assert_called_once()
+            assert [os.path.basename(path) for path in listed] == ['a.png', 'c.jpg', 'd.png']
+            assert [r['data']['invoice_number'] for r in results] == ['IMG-1', 'TXT-1', 'IMG-2', 'IMG-3']
+
+            # Output that doesn't split into one page per image falls back to single runs
+            pytesseract.image_to_string.side_effect = lambda list_file, config: 'one page only'
+            with patch.object(processor, 'extract_text_from_image', return_value='Invoice #: ONE') as single:
+                results = processor.process_documents_by_id(doc_ids, use_cache=False)
+
+        assert single.call_count == 3
+        assert [r['data']['invoice_number'] for r in results] == ['ONE', 'TXT-1', 'ONE', 'ONE']
+
+    def test_batched_ocr_skips_invalid_images(self, workdir, db_manager, processor):
+        """Test images process_document_by_id() would reject stay out of the batched run"""
+        if USE_SIMULATION:
+            pytest.skip('text extraction is simulated without the OCR libraries')
+        contents = {'a.png': 'x', 'big.png': 'x' * 200, 'gone.png': 'x', 'c.jpeg': 'x', 'd.jpg': 'x'}
+        doc_ids = []
+        for i, (name, content) in enumerate(contents.items()):
+            path = os.path.join(workdir, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            doc_ids.append(db_manager.store_document({'filename': name, 'file_path': path,
+                                                      'status': 'pending', 'file_hash': f'hash{i}'}))
+        os.unlink(os.path.join(workdir, 'gone.png'))
+        processor.max_file_size = 100
+        listed = []
+
+        def image_to_string(list_file, config):
+            with open(list_file) as f:
+                listed.extend(f.read().split())
+            return 'Invoice #: IMG-1\n\x0cInvoice #: IMG-2\n\x0c'
+
+        with patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', False), \
+             patch.object(tesseract_engine, 'pytesseract', create=True) as pytesseract, \
+             patch.object(processor, '_allowed_ext', frozenset(('png', 'jpg'))):
+            pytesseract.image_to_string.side_effect = image_to_string
+            results = processor.process_documents_by_id(doc_ids)
+
+        assert [os.path.basename(path) for path in listed] == ['a.png', 'd.jpg']
+        assert [r['success'] for r in results] == [True, False, False, False, True]
+        assert [results[0]['data']['invoice_number'], results[4]['data']['invoice_number']] == ['IMG-1', 'IMG-2']
+
+    def test_file_checked_with_one_stat(self, workdir, db_manager, processor):
+        """Test the file's existence and size come from a single stat() call"""
+        doc_id = self.store_txt(workdir, db_manager, 'first.txt')
+        with patch.object(os, 'stat', wraps=os.stat) as stat:
+            result = processor.process_document_by_id(doc_id)
+
+        assert result['success']
+        assert [c.args[0] for c in stat.call_args_list].count(db_manager.get_document(doc_id)['file_path']) == 1
+
+    def test_missing_file_fails(self, workdir, db_manager, processor):
+        """Test a document whose file is gone fails with a not-found error"""
+        doc_id = self.store_txt(workdir, db_manager, 'gone.txt')
+        os.unlink(db_manager.get_document(doc_id)['file_path'])
+
+        result = processor.process_document_by_id(doc_id)
+
+        assert not result['success']
+        assert result['error'].startswith('File not found:')
+        assert processor.get_file_info('/nonexistent.pdf')['exists'] is False
+
+
+class TestTextExtraction:
+    """Test direct text extraction from documents"""
+
+    def test_tesserocr_api_reused(self):
+        """Test image OCR creates one TessBaseAPI per processor and ends it on close()"""
+        api = Mock(**{'GetUTF8Text.return_value': ' Total: $5 \n'})
+        tesserocr = Mock(**{'PyTessBaseAPI.return_value': api})
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        with patch.object(document_processor, 'USE_SIMULATION', False), \
+             patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', True), \
+             patch.object(tesseract_engine, 'tesserocr', tesserocr, create=True), \
+             patch.object(document_processor, 'Image', create=True):
+            processor = DocumentProcessor(config, db_manager=None)
+            texts = [processor.extract_text_from_image('scan.png') for _ in range(3)]
+            processor.close()
+
+        assert texts == ['Total: $5'] * 3
+        tesserocr.PyTessBaseAPI.assert_called_once_with(psm=6)
+        assert api.SetImage.call_count == 3
+        api.End.assert_called_once_with()
+
+    @pytest.mark.parametrize('raw, expected', [
+        ('Total: €5\r\nDue\rNow\n'.encode('utf-8'), 'Total: €5\nDue\nNow'),
+        ('Café £5\r\n'.encode('latin-1'), 'Café £5'),
+    ])
+    def test_txt_decoded_from_one_read(self, raw, expected):
+        """Test text files decode as UTF-8, else Latin-1, with universal newlines"""
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, 'invoice.txt')
+        with open(path, 'wb') as f:
+            f.write(raw)
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        processor = DocumentProcessor(config, db_manager=None)
+
+        with patch('builtins.open', wraps=open) as opened:
+            assert processor.extract_text_from_txt(path) == expected
+        assert opened.call_count == 1
+
+    def test_image_ocred_in_grayscale(self):
+        """Test images reach Tesseract as a single grayscale channel"""
+        Image = pytest.importorskip('PIL.Image')
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, 'scan.png')
+        Image.new('RGB', (20, 10), 'white').save(path)
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+
+        with patch.object(document_processor, 'USE_SIMULATION', False), \
+             patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', False), \
+             patch.object(tesseract_engine, 'pytesseract', create=True) as pytesseract:
+            pytesseract.image_to_string.return_value = 'Total: $5\n'
+            text = DocumentProcessor(config, db_manager=None).extract_text_from_image(path)
+
+        assert text == 'Total: $5'
+        assert pytesseract.image_to_string.call_args.args[0].mode == 'L'
+
+    def test_pdf_pages_joined_in_order(self):
+        """Test PDF page texts are joined with a newline between pages"""
+        fitz = pytest.importorskip('fitz')
+        path = os.path.join(tempfile.mkdtemp(), 'doc.pdf')
+        doc = fitz.open()
+        for i in range(3):
+            doc.new_page().insert_text((50, 50), f'Page {i}')
+        doc.save(path)
+        doc.close()
+
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        processor = DocumentProcessor(config, db_manager=None)
+
+        assert processor.extract_text_from_pdf(path) == 'Page 0\n\nPage 1\n\nPage 2'
+
+    @pytest.mark.parametrize('mode, expected', [
+        ('blocks', 'Invoice 7\nTotal: 5.00'),
+        ('text', 'Total: 5.00\nInvoice 7'),
+    ])
+    def test_pdf_text_mode(self, mode, expected):
+        """Test blocks mode reads text top to bottom while text mode keeps content order"""
+        fitz = pytest.importorskip('fitz')
+        path = os.path.join(tempfile.mkdtemp(), 'doc.pdf')
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((50, 400), 'Total: 5.00')
+        page.insert_text((50, 50), 'Invoice 7')
+        doc.save(path)
+        doc.close()
+
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        config.set('processing', 'pdf_text_mode', mode)
+        processor = DocumentProcessor(config, db_manager=None)
+
+        assert processor.extract_text_from_pdf(path) == expected
+
+    @staticmethod
+    def make_scanned_pdf(path, fitz):
+        """Write a PDF with a text page, a scanned (image-only) page and a blank page"""
+        Image = pytest.importorskip('PIL.Image')
+        png = io.BytesIO()
+        Image.new('L', (20, 20), 255).save(png, format='PNG')
+        doc = fitz.open()
+        doc.new_page().insert_text((50, 50), 'Invoice 7')
+        scanned = doc.new_page()
+        scanned.insert_image(scanned.rect, stream=png.getvalue())
+        doc.new_page()
+        doc.save(path)
+        doc.close()
+
+    def test_pdf_scanned_pages_ocred(self):
+        """Test only PDF pages with images and no text layer are rendered and OCRed"""
+        fitz = pytest.importorskip('fitz')
+        path = os.path.join(tempfile.mkdtemp(), 'doc.pdf')
+        self.make_scanned_pdf(path, fitz)
+
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        with patch.object(document_processor, 'USE_SIMULATION', False), \
+             patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', False), \
+             patch.object(tesseract_engine, 'pytesseract', create=True) as pytesseract:
+            pytesseract.image_to_string.return_value = 'Total: $5\n'
+            text = DocumentProcessor(config, db_manager=None).extract_text_from_pdf(path)
+
+        assert text == 'Invoice 7\n\nTotal: $5'
+        pytesseract.image_to_string.assert_called_once()
+        assert pytesseract.image_to_string.call_args.args[0].mode == 'L'
+
+    def test_pdf_page_ocr_failure_skips_page(self):
+        """Test a page whose OCR fails contributes no text instead of failing the PDF"""
+        fitz = pytest.importorskip('fitz')
+        path = os.path.join(tempfile.mkdtemp(), 'doc.pdf')
+        self.make_scanned_pdf(path, fitz)
+
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        with patch.object(document_processor, 'USE_SIMULATION', False), \
+             patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', False), \
+             patch.object(tesseract_engine, 'pytesseract', create=True) as pytesseract:
+            pytesseract.image_to_string.side_effect = OSError('tesseract is not installed')
+            text = DocumentProcessor(config, db_manager=None).extract_text_from_pdf(path)
+
+        assert text == 'Invoice 7'
+
+
+class TestParseInvoiceData:
+    """Test pattern-based invoice parsing"""
+
+    @pytest.fixture
+    def processor(self):
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        return DocumentProcessor(config, db_manager=None)
+
+    def test_fields_parsed(self, processor):
+        """Test invoice number, dates, total and vendor are found"""
+        if USE_SIMULATION:
+            pytest.skip('parsing is simulated without the OCR libraries')
+        data = processor.parse_invoice_data(
+            "ACME Ltd\n01/02/2024\nInv. # A-17\nDue 15/02/2024\nAmount due: €12.50\n")
+
+        assert data['vendor_name'] == 'ACME Ltd'
+        assert data['invoice_number'] == 'A-17'
+        assert (data['invoice_date'], data['due_date']) == ('01/02/2024', '15/02/2024')
+        assert (data['total_amount'], data['currency']) == (12.5, 'EUR')
+
+    def test_amount_followed_by_currency_code(self, processor):
+        """Test the amount-then-code pattern follows the detected currency"""
+        if USE_SIMULATION:
+            pytest.skip('parsing is simulated without the OCR libraries')
+        assert processor.parse_invoice_data("Fee 40 GBP")['total_amount'] == 40.0
+        assert processor.parse_invoice_data("Fee 40 EUR")['total_amount'] == 40.0
+
+    @pytest.mark.parametrize('text, vendor', [
+        ("01/02/2024 Tax invoice\n$ 12.50\nCo.", None),
+        ("12-03-24\n€ 5.00\nBig Co\nOther Co", 'Big Co'),
+        ("1\n2\n3\n4\n5\nLate Vendor", None),
+    ])
+    def test_vendor_is_first_plausible_line(self, processor, text, vendor):
+        """Test dates, numeric lines and short lines are skipped within the first 5 lines"""
+        if USE_SIMULATION:
+            pytest.skip('parsing is simulated without the OCR libraries')
+        assert processor.parse_invoice_data(text)['vendor_name'] == vendor
+
+
+class TestAllowedFiles:
+    """Test file extension checks"""
+
+    @pytest.mark.parametrize('filename, allowed', [
+        ('invoice.PDF', True),
+        ('scan.tar.txt', True),
+        ('photo.jpg', True),
+        ('notes.doc', False),
+        ('pdf', False),
+        ('invoice.', False),
+        ('', False),
+    ])
+    def test_is_allowed_file(self, filename, allowed):
+        """Test extensions are matched case-insensitively against the normalized setting"""
+        workdir = tempfile.mkdtemp()
+        config = Config(os.path.join(workdir, 'config.ini'))
+        config.set('processing', 'upload_folder', os.path.join(workdir, 'uploads'))
+        config.set('processing', 'allowed_extensions', 'pdf, TXT,.jpg,')
+        processor = DocumentProcessor(config, db_manager=None)
+
+        assert processor.is_allowed_file(filename) is allowed
@@ -1,3 +1,258 @@
 # tests/test_ocr.py
+"""
+Test suite for the OCR processor's PDF pipeline.
+Tesseract is mocked and PDFs are generated with PyMuPDF, so no native tools are needed.
+"""
+
+import io
+import os
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+from PIL import Image
+
+fitz = pytest.importorskip('fitz')
+
+from core import ocr_processor, tesseract_engine
+from core.ocr_processor import LazyPage, OCRProcessor
+
+
 def test_ocr_placeholder():
     assert True
+
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+
+def fake_tesseract(pages_text, confidences):
+    """Build a subprocess.run replacement that writes tesseract txt/tsv output"""
+    def run(cmd, **kwargs):
+        output_base = cmd[2]
+        with open(output_base + '.txt', 'w') as f:
+            f.write('\n'.join(pages_text))
+        with open(output_base + '.tsv', 'w') as f:
+            f.write(TSV_HEADER)
+            f.write("1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t\n")
+            for conf in confidences:
+                f.write(f"5\t1\t1\t1\t1\t1\t0\t0\t10\t10\t{conf}\tword\n")
+    return run
+
+
+@pytest.mark.parametrize('tsv, expected', [
+    ('', (0.0, 0)),
+    (TSV_HEADER, (0.0, 0)),
+    (TSV_HEADER + "1\t1\t0\t0\t0\t0\t0\t0\t9\t9\t-1\t\n5\t1\t1\t1\t1\t1\t0\t0\t9\t9\t90.5\tw\n"
+     "5\t1\t1\t1\t1\t2\t0\t0\t9\t9\t0\t \n5\t1\n5\t1\t1\t1\t1\t3\t0\t0\t9\t9\t70\tx\n", (160.5, 2)),
+])
+def test_tsv_confidence_totals(tsv, expected):
+    """Test only positive word confidences are summed and short rows are skipped"""
+    assert ocr_processor._tsv_confidence_totals(io.StringIO(tsv)) == expected
+
+@pytest.mark.parametrize('text, pages', [
+    ('a\n\x0cb\n\x0c', ['a', 'b']),
+    ('a\n\x0c\x0c', ['a', '']),
+    ('single page', ['single page']),
+    ('', ['']),
+])
+def test_split_pages(text, pages):
+    """Test tesseract output splits on form feeds, ignoring the one after the last page"""
+    assert tesseract_engine.split_pages(text) == pages
+
+class TestOCRProcessorPDF:
+    """Test PDF OCR through a single batched tesseract run"""
+
+    @pytest.fixture
+    def pdf_path(self):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            yield tmp.name
+        os.unlink(tmp.name)
+
+    @pytest.fixture
+    def processor(self):
+        with patch.object(ocr_processor, 'TESSERACT_AVAILABLE', True):
+            yield OCRProcessor(engine='tesseract')
+
+    @staticmethod
+    def make_pdf(path, page_count, text=None):
+        doc = fitz.open()
+        for _ in range(page_count):
+            page = doc.new_page(width=72, height=72)
+            if text:
+                page.insert_text((5, 20), text, fontsize=1)
+        doc.save(path)
+        doc.close()
+
+    def test_text_pdf_skips_ocr(self, processor, pdf_path):
+        """Test a PDF with a text layer is read directly instead of OCRed"""
+        self.make_pdf(pdf_path, 3, 'Invoice INV-001 ' * 4)
+        with patch.object(processor, '_tesseract_extract_pdf') as ocr:
+            text = processor._extract_from_pdf(pdf_path)
+
+        ocr.assert_not_called()
+        assert text.count('Invoice INV-001') == 12
+
+    def test_scanned_pdf_goes_to_ocr(self, processor, pdf_path):
+        """Test a PDF without enough text on its first pages is OCRed"""
+        self.make_pdf(pdf_path, 3)
+        with patch.object(processor, '_tesseract_extract_pdf', return_value=('scanned', 90.0)) as ocr:
+            text = processor._extract_from_pdf(pdf_path)
+
+        ocr.assert_called_once_with(pdf_path)
+        assert text == 'scanned'
+
+    def test_pdf_pages_ocr_in_one_run(self, processor, pdf_path):
+        """Test a batch of pages goes to tesseract through one list file"""
+        self.make_pdf(pdf_path, 3)
+        with patch.object(ocr_processor, 'pytesseract', create=True), \
+             patch.object(ocr_processor.os, 'cpu_count', return_value=1), \
+             patch.object(ocr_processor.subprocess, 'run',
+                          side_effect=fake_tesseract(['INVOICE', 'Total: $10.00'], [90, 70])) as run:
+            text, confidence = processor._tesseract_extract_pdf(pdf_path)
+
+        assert run.call_count == 1
+        assert run.call_args[0][0][-2:] == ['txt', 'tsv']
+        assert text == 'INVOICE\nTotal: $10.00'
+        assert confidence == 80
+
+    def test_pdf_batches_split_across_workers(self, processor, pdf_path):
+        """Test pages are split into one batch per worker and merged in order"""
+        self.make_pdf(pdf_path, 4)
+        with patch.object(ocr_processor, 'pytesseract', create=True), \
+             patch.object(ocr_processor.os, 'cpu_count', return_value=2), \
+             patch.object(processor, '_get_pool', return_value=ThreadPoolExecutor(2)), \
+             patch.object(ocr_processor.subprocess, 'run',
+                          side_effect=fake_tesseract(['page'], [60, 80])) as run:
+            text, confidence = processor._tesseract_extract_pdf(pdf_path)
+
+        assert run.call_count == 2
+        assert text == 'page\npage'
+        assert confidence == 70
+
+    def test_pdf_pages_streamed_in_chunks(self, processor, pdf_path):
+        """Test long PDFs are OCRed in runs of at most pdf_chunk_size pages"""
+        self.make_pdf(pdf_path, 5)
+        processor.pdf_chunk_size = 2
+        batch_sizes = []
+        tesseract = fake_tesseract(['page'], [50, 100])
+
+        def run(cmd, **kwargs):
+            with open(cmd[1]) as f:
+                batch_sizes.append(len(f.read().split()))
+            return tesseract(cmd, **kwargs)
+
+        with patch.object(ocr_processor, 'pytesseract', create=True), \
+             patch.object(ocr_processor.os, 'cpu_count', return_value=1), \
+             patch.object(processor, '_get_pool', return_value=ThreadPoolExecutor(1)), \
+             patch.object(ocr_processor.subprocess, 'run', side_effect=run):
+            text, confidence = processor._tesseract_extract_pdf(pdf_path)
+
+        assert batch_sizes == [2, 2, 1]
+        assert text == 'page\npage\npage'
+        assert confidence == 75
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 10])
+    def test_page_separator_independent_of_chunks(self, processor, pdf_path, chunk_size):
+        """Test tesseract's form feeds become the same newline that joins chunks"""
+        self.make_pdf(pdf_path, 5)
+        processor.pdf_chunk_size = chunk_size
+
+        def run(cmd, **kwargs):
+            with open(cmd[1]) as f:
+                pages = [path.rsplit('-', 1)[1].split('.')[0] for path in f.read().split()]
+            fake_tesseract([''.join(f'page {i}\n\f' for i in pages)], [90])(cmd, **kwargs)
+
+        with patch.object(ocr_processor, 'pytesseract', create=True), \
+             patch.object(ocr_processor.os, 'cpu_count', return_value=1), \
+             patch.object(processor, '_get_pool', return_value=ThreadPoolExecutor(1)), \
+             patch.object(ocr_processor.subprocess, 'run', side_effect=run):
+            text, _ = processor._tesseract_extract_pdf(pdf_path)
+
+        assert text == 'page 0\npage 1\npage 2\npage 3\npage 4'
+
+    def test_low_confidence_chunks_escalate_dpi(self, processor, pdf_path):
+        """Test only chunks below the confidence threshold are re-run at full DPI"""
+        self.make_pdf(pdf_path, 4)
+        processor.pdf_chunk_size = 2
+        passes = []
+
+        def run(cmd, **kwargs):
+            with open(cmd[1]) as f:
+                pages = f.read().split()
+            with Image.open(pages[0]) as image:
+                dpi = image.width  # pages are 72pt (1 inch) square
+            passes.append((len(pages), dpi))
+            # The first chunk reads poorly at draft DPI
+            conf = 40 if dpi == 150 and pages[0].endswith('page-0.png') else 90
+            return fake_tesseract([f'{dpi}'], [conf])(cmd, **kwargs)
+
+        with patch.object(ocr_processor, 'pytesseract', create=True), \
+             patch.object(ocr_processor.os, 'cpu_count', return_value=1), \
+             patch.object(processor, '_get_pool', return_value=ThreadPoolExecutor(1)), \
+             patch.object(ocr_processor.subprocess, 'run', side_effect=run):
+            text, confidence = processor._tesseract_extract_pdf(pdf_path)
+
+        assert passes == [(2, 150), (2, 150), (2, 300)]
+        assert text == '300\n150'
+        assert confidence == 90
+
+class TestOCRProcessorImage:
+    """Test image OCR through the resident tesserocr API"""
+
+    def test_tesserocr_api_reused(self):
+        """Test one TessBaseAPI is created per processor and ended on close()"""
+        api = Mock(**{'GetUTF8Text.return_value': ' Total: $5 \n'})
+        tesserocr = Mock(**{'PyTessBaseAPI.return_value': api})
+        with tempfile.NamedTemporaryFile(suffix='.png') as tmp, \
+             patch.object(ocr_processor, 'TESSERACT_AVAILABLE', True), \
+             patch.object(tesseract_engine, 'TESSEROCR_AVAILABLE', True), \
+             patch.object(tesseract_engine, 'tesserocr', tesserocr, create=True), \
+             patch.object(ocr_processor, 'Image', create=True):
+            processor = OCRProcessor(engine='tesseract', language='deu')
+            texts = [processor._tesseract_extract_image(tmp.name) for _ in range(3)]
+            processor.close()
+
+        assert texts == ['Total: $5'] * 3
+        tesserocr.PyTessBaseAPI.assert_called_once_with(lang='deu')
+        assert api.SetImage.call_count == 3
+        api.End.assert_called_once_with()
+
+
+    def test_health_check_runs_tesseract_once(self):
+        """Test the health check queries the tesseract version with a single exec"""
+        with patch.object(ocr_processor, 'TESSERACT_AVAILABLE', True), \
+             patch.object(ocr_processor, 'pytesseract', create=True) as pytesseract:
+            pytesseract.get_tesseract_version.return_value = '5.3.0'
+            status = OCRProcessor(engine='tesseract').health_check()
+
+        pytesseract.get_tesseract_version.assert_called_once_with()
+        assert status['tesseract_version'] == '5.3.0'
+        assert status['status'] == 'healthy'
+
+class TestLazyPage:
+    """Test deferred rasterization of PDF pages"""
+
+    @pytest.fixture
+    def pdf_path(self):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            pass
+        TestOCRProcessorPDF.make_pdf(tmp.name, 2)
+        yield tmp.name
+        os.unlink(tmp.name)
+
+    def test_render_grayscale(self, pdf_path):
+        """Test a page is rasterized in one channel at its DPI, with or without an open document"""
+        page = LazyPage(pdf_path, 1, 72)
+        pixmap = page.render()
+        assert (pixmap.width, pixmap.height, pixmap.n) == (72, 72, 1)
+
+        with fitz.open(pdf_path) as doc:
+            assert page.render(doc).samples == pixmap.samples
+
+    def test_pickles_metadata_only(self, pdf_path):
+        """Test a page is sent to workers as its path, index and DPI"""
+        clone = pickle.loads(pickle.dumps(LazyPage(pdf_path, 1, 72)))
+
+        assert (clone.pdf_path, clone.page_index, clone.dpi) == (pdf_path, 1, 72)
@@ -0,0 +1,85 @@
+# tests/test_processor.py
+"""
+Test suite for the batched document pipeline in core.processor.
+OCR is mocked; results are stored in a temporary SQLite database.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from core.processor import Processor
+from database.connection import DatabaseManager
+
+
+TEXTS = {
+    'a.pdf': "Invoice #: INV-1\nTotal: $10.00\n",
+    'b.png': "Invoice #: INV-2\nTotal: €20.50\n",
+    'c.pdf': "",
+}
+
+
+class TestProcessDocuments:
+    """Test Processor.process_documents()"""
+
+    @pytest.fixture
+    def workdir(self):
+        workdir = tempfile.mkdtemp()
+        for name in TEXTS:
+            with open(os.path.join(workdir, name), 'w') as f:
+                f.write('scan')
+        return workdir
+
+    @pytest.fixture
+    def db_manager(self, workdir):
+        manager = DatabaseManager(Mock(get=Mock(return_value=os.path.join(workdir, 'middleware.db'))))
+        yield manager
+        manager.close()
+
+    @staticmethod
+    def fake_ocr(threads):
+        def extract_text(file_path):
+            threads.add(threading.get_ident())
+            name = os.path.basename(file_path)
+            if name == 'missing.pdf':
+                raise FileNotFoundError(f"File not found: {file_path}")
+            return TEXTS[name]
+        return Mock(extract_text=Mock(side_effect=extract_text))
+
+    def test_results_in_input_order_and_stored_in_batch(self, workdir, db_manager):
+        """Test documents are OCRed on worker threads and successes are stored together"""
+        threads = set()
+        processor = Processor(self.fake_ocr(threads), db_manager, max_workers=2)
+        paths = [(os.path.join(workdir, name), name.rsplit('.', 1)[1])
+                 for name in ['a.pdf', 'b.png', 'c.pdf', 'missing.pdf']]
+        paths.insert(2, (os.path.join(workdir, 'd.txt'), 'txt'))
+
+        db_manager.store_documents = Mock(wraps=db_manager.store_documents)
+        results = processor.process_documents(paths)
+
+        assert threading.get_ident() not in threads
+        assert [r['success'] for r in results] == [True, True, False, False, False]
+        assert results[0]['data']['invoice_number'] == 'INV-1'
+        assert results[1]['data']['currency'] == 'EUR'
+        assert results[2]['error'] == 'Unsupported file type'
+        assert results[3]['error'] == 'No text provided'
+        assert results[4]['error_type'] == 'FileNotFoundError'
+        assert results[0]['data']['extraction_timestamp'] == results[1]['data']['extraction_timestamp']
+
+        db_manager.store_documents.assert_called_once()
+        stored = db_manager.get_document(results[1]['document_id'])
+        assert stored['status'] == 'completed'
+        assert stored['amount'] == 20.5
+        assert json.loads(stored['extracted_data'])['invoice_number'] == 'INV-2'
+        assert 'document_id' not in results[3]
+
+    def test_without_database(self, workdir):
+        """Test results are returned without storing when no db_manager is set"""
+        processor = Processor(self.fake_ocr(set()))
+        results = processor.process_documents([(os.path.join(workdir, 'a.pdf'), 'pdf')])
+
+        assert results[0]['success'] and 'document_id' not in results[0]
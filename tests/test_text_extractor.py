@@ -0,0 +1,223 @@
+# tests/test_text_extractor.py
+"""
+Test suite for invoice data extraction.
+Tests field, currency, line item and vendor extraction from OCR text.
+"""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from core import text_extractor
+from core.text_extractor import InvoiceDataExtractor, InvoiceRecord, extract_invoice_data
+
+
+SAMPLE_INVOICE = (
+    "ACME Supplies\n"
+    "billing@acme.com  (555) 123-4567\n"
+    "Invoice #: INV-2024-001\n"
+    "Date: 03/15/2024\n"
+    "2 Widgets $10.00\n"
+    "1 Gadget 25.50\n"
+    "Subtotal: 45.50\n"
+    "Tax: 4.55\n"
+    "Total: $50.05\n"
+)
+
+
+class TestInvoiceDataExtractor:
+    """Test InvoiceDataExtractor against sample OCR text"""
+
+    @pytest.fixture
+    def extractor(self):
+        return InvoiceDataExtractor()
+
+    def test_extract_fields(self, extractor):
+        """Test the invoice fields are extracted from a full invoice"""
+        result = extractor.extract_invoice_data(SAMPLE_INVOICE)
+
+        assert result['invoice_number'] == 'INV-2024-001'
+        assert result['date'] == '2024-03-15'
+        assert result['tax_amount'] == 4.55
+        assert result['subtotal'] == 45.5
+        assert result['currency'] == 'USD'
+        assert result['confidence_score'] == 1.0
+
+    def test_extract_line_items_and_vendor(self, extractor):
+        """Test line items and vendor contact details"""
+        result = extractor.extract_invoice_data(SAMPLE_INVOICE)
+
+        assert result['line_items'] == [
+            {'quantity': 2, 'description': 'Widgets', 'unit_price': 10.0, 'total_price': 20.0},
+            {'quantity': 1, 'description': 'Gadget', 'unit_price': 25.5, 'total_price': 25.5},
+        ]
+        assert result['vendor_info']['email'] == 'billing@acme.com'
+
+    @pytest.mark.parametrize('date_str, expected', [
+        ('03/15/2024', '2024-03-15'),
+        ('15-03-2024', '2024-03-15'),
+        ('1.2.2024', '2024-01-02'),
+        ('02/30/2024', '02/30/2024'),
+        ('01/02-2024', '01/02-2024'),
+        ('1/2/24', '1/2/24'),
+    ])
+    def test_parse_date(self, extractor, date_str, expected):
+        """Test dates are read month-first, then day-first, else kept as matched"""
+        assert extractor._parse_date(date_str) == expected
+
+    def test_line_items_capped(self, extractor):
+        """Test scanning stops once the line item limit is reached"""
+        text = '\n'.join(f'{i} Item{i} {i}.00' for i in range(1, 30))
+        items = extractor._extract_line_items(text)
+
+        assert len(items) == 10
+        assert items[-1] == {'quantity': 10, 'description': 'Item10', 'unit_price': 10.0, 'total_price': 100.0}
+
+    @pytest.mark.parametrize('text, currency, total', [
+        ('Total €99.99 due', 'EUR', 99.99),
+        ('Balance: £5', 'GBP', 5.0),
+        ('AMOUNT DUE: 12', 'USD', 12.0),
+        ('nothing to see', 'USD', None),
+    ])
+    def test_currency_and_total(self, extractor, text, currency, total):
+        """Test currency detection and case-insensitive total matching"""
+        result = extractor.extract_invoice_data(text)
+
+        assert result['currency'] == currency
+        assert result['total_amount'] == total
+
+    def test_pattern_precedence(self, extractor):
+        """Test the first listed pattern wins over earlier matches of later ones"""
+        fields = extractor._match_fields("Ref 01/02/2024\nIssued: 03/04/2024\nInv: A1 Invoice: B2")
+
+        assert fields['date'] == '03/04/2024'
+        assert fields['invoice_number'] == 'B2'
+
+    @pytest.mark.parametrize('text, currency', [
+        ('Paid in AUD', 'AUD'),
+        ('Paid in AUD, A$20', 'USD'),
+        ('Pound sterling, 20 EUR', 'EUR'),
+        ('Prices in euro', 'EUR'),
+    ])
+    def test_currency_priority(self, extractor, text, currency):
+        """Test currencies are ranked by priority, not position in the text"""
+        assert extractor._match_fields(text).get('currency') == currency
+
+    def test_currency_found_in_field_scan(self, extractor):
+        """Test the field scan also reports the top-priority currency"""
+        fields = extractor._match_fields("AUD 5 Total: €20.00 Tax: 2.00")
+
+        assert fields['currency'] == 'EUR'
+        assert fields['total'] == '20.00'
+        assert 'currency' not in extractor._match_fields("Total: 20.00")
+
+    def test_batch_shares_one_timestamp(self, extractor):
+        """Test a batch takes the current time once and stamps every result with it"""
+        with patch.object(text_extractor, 'datetime') as clock:
+            clock.utcnow.return_value.isoformat.return_value = '2024-03-15T00:00:00'
+            results = extractor.extract_invoice_data_batch([SAMPLE_INVOICE, "", "no data"])
+
+        clock.utcnow.assert_called_once_with()
+        assert [r['extraction_timestamp'] for r in results] == ['2024-03-15T00:00:00'] * 3
+        assert results[0]['invoice_number'] == 'INV-2024-001'
+
+    def test_record_matches_dict_result(self, extractor):
+        """Test the slotted record converts to the dict extract_invoice_data() returns"""
+        record = extractor.extract_invoice_record(SAMPLE_INVOICE, '2024-03-15T00:00:00')
+
+        assert isinstance(record, InvoiceRecord) and not hasattr(record, '__dict__')
+        assert record.to_dict() == extractor.extract_invoice_data(SAMPLE_INVOICE, '2024-03-15T00:00:00')
+        assert 'error' not in record.to_dict()
+        assert extractor.extract_invoice_record("").to_dict()['error'] == "No text provided"
+
+    def test_extract_many_returns_columns(self, extractor):
+        """Test a batch comes back as one list per field, in input order"""
+        columns = extractor.extract_many([SAMPLE_INVOICE, "", "Total €99.99 due"])
+
+        assert columns['invoice_number'] == ['INV-2024-001', None, None]
+        assert columns['total_amount'][2] == 99.99
+        assert columns['currency'] == ['USD', 'USD', 'EUR']
+        assert columns['error'] == [None, "No text provided", None]
+        assert len(set(columns['extraction_timestamp'])) == 1
+
+    def test_convenience_function(self, extractor):
+        """Test extract_invoice_data() matches a fresh extractor"""
+        expected = extractor.extract_invoice_data(SAMPLE_INVOICE)
+        result = extract_invoice_data(SAMPLE_INVOICE)
+
+        for key in ('invoice_number', 'date', 'total_amount', 'line_items', 'currency'):
+            assert result[key] == expected[key]
+
+    def test_empty_text(self, extractor):
+        """Test empty input returns the empty result"""
+        result = extractor.extract_invoice_data("  ")
+
+        assert result['invoice_number'] is None
+        assert result['error'] == "No text provided"
+
+    def test_text_without_digits_keeps_currency_and_email(self, extractor):
+        """Test text with no digits or invoice label still yields currency and vendor email"""
+        text = 'Receipt from ACME Ltd\nPay in EUR (€)\nContact: billing@acme.example'
+        result = extractor.extract_invoice_data(text)
+
+        assert 'error' not in result
+        assert result['currency'] == 'EUR'
+        assert result['vendor_info'] == {'email': 'billing@acme.example'}
+        assert result['raw_text'] == text
+        assert not extractor.get_extraction_summary(result).startswith("Extraction failed")
+        assert extractor.extract_invoice_data("Invoice: ABC")['invoice_number'] == 'ABC'
+
+
+@pytest.mark.parametrize('available', [True, False])
+def test_linear_patterns_use_re2_when_installed(available):
+    """Test whole-text patterns are compiled with re2 only when it is importable"""
+    re2 = Mock()
+    with patch.object(text_extractor, 'RE2_AVAILABLE', available), \
+         patch.object(text_extractor, 're2', re2, create=True):
+        pattern = text_extractor._compile_linear(r'(?m)^(\d+)')
+
+    assert re2.compile.called == available
+    if not available:
+        assert pattern.findall('1\n22') == ['1', '22']
+
+
+@pytest.mark.parametrize('text', [SAMPLE_INVOICE, "AUD 5 Total: €20.00 Tax: 2.00", "Réf Date: 1/2/2024 Total: ٣", ""])
+def test_hyperscan_matches_re_scan(text):
+    """Test the Hyperscan field scan returns exactly what the re scan does"""
+    pytest.importorskip('hyperscan')
+    extractor = InvoiceDataExtractor()
+    assert text_extractor._HYPERSCAN_DB is not None
+
+    with patch.object(text_extractor, '_HYPERSCAN_DB', None):
+        expected = extractor._match_fields(text)
+
+    assert extractor._match_fields_hyperscan(text) == expected
+
+
+def test_convenience_function_caches_by_text():
+    """Test a repeated text is extracted once and each caller gets its own copy"""
+    text_extractor._extract_invoice_data_cached.cache_clear()
+    with patch.object(text_extractor._EXTRACTOR, 'extract_invoice_data',
+                      wraps=text_extractor._EXTRACTOR.extract_invoice_data) as extract:
+        first = extract_invoice_data(SAMPLE_INVOICE)
+        first['line_items'].clear()
+        second = extract_invoice_data(SAMPLE_INVOICE)
+
+    extract.assert_called_once_with(SAMPLE_INVOICE)
+    assert len(second['line_items']) == 2
+    text_extractor._extract_invoice_data_cached.cache_clear()
+
+
+@pytest.mark.parametrize('orjson_available', [True, False])
+def test_to_json_round_trips(orjson_available):
+    """Test results serialize to the same data with either JSON encoder"""
+    if orjson_available:
+        pytest.importorskip('orjson')
+    result = InvoiceDataExtractor().extract_invoice_data(SAMPLE_INVOICE.replace('$50.05', '€50.05'))
+
+    with patch.object(text_extractor, 'ORJSON_AVAILABLE', orjson_available):
+        encoded = text_extractor.to_json(result)
+
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == result
@@ -424,6 +424,20 @@ class TestUtilityFunctions:
             assert result is not None
             assert len(result) > 0
 
+    def test_get_file_hash(self):
+        """Test the upload hash is the SHA-256 of the whole file content"""
+        import hashlib
+        get_file_hash = pytest.importorskip('web.routes.utils').get_file_hash
+
+        content = os.urandom(300000)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+        try:
+            assert get_file_hash(f.name) == hashlib.sha256(content).hexdigest()
+        finally:
+            os.unlink(f.name)
+        assert get_file_hash(f.name) == ""
+
 
 class TestTemplateRendering:
     """Test template rendering functionality"""
@@ -52,8 +52,8 @@ def create_app(config_path: str = None) -> Flask:
     """Create and configure Flask application"""
     app = Flask(__name__)
     
-    # Load configuration
-    config = Config(config_path)
+    # Load configuration (shared per process, parsed once)
+    config = Config.instance(config_path)
     
     # Configure Flask app
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', config.get('web_interface', 'secret_key', fallback=secrets.token_hex(32)))
@@ -224,7 +224,7 @@ def main():
     print(f"Attempting to load configuration from: {config_file_path}") # Debugging line
 
     # Load configuration by passing the determined path
-    config = Config(config_file_path)
+    config = Config.instance(config_file_path)
     
     # Create Flask app, passing the config object or the path again
     # It's generally better to pass the config object if it's already loaded,
@@ -41,19 +41,14 @@ def allowed_file(filename: str) -> bool:
         return False
     
     ext = filename.rsplit('.', 1)[1].lower()
-    # Ensure config and key exist before splitting
-    allowed_extensions_str = config.get('processing', 'allowed_extensions', fallback='pdf,jpg,jpeg,png')
-    allowed_extensions = [e.strip() for e in allowed_extensions_str.split(',')]
-    return ext in allowed_extensions
+    return ext in config.get_set('processing', 'allowed_extensions', 'pdf,jpg,jpeg,png')
 
 def get_file_hash(filepath: str) -> str:
     """Calculate SHA-256 hash of file content"""
     try:
-        hash_sha256 = hashlib.sha256()
+        # file_digest reads in large blocks with the GIL released
         with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            return hashlib.file_digest(f, "sha256").hexdigest()
     except Exception as e:
         logger.error(f"Error calculating file hash: {e}")
         return ""
@@ -506,18 +501,9 @@ def upload_file():
         if auto_process and doc_processor:
             try:
                 logger.info(f"Starting automatic processing for document ID {doc_id}")
-                # Update status to processing
-                db_manager.update_document(doc_id, status='processing')
-                
+                # process_document_by_id records the completed/failed status itself
                 result = doc_processor.process_document_by_id(doc_id)
                 logger.info(f"Processing result for doc {doc_id}: {result}")
-                
-                # Update status based on result
-                if result and result.get('success', False):
-                    db_manager.update_document(doc_id, status='completed')
-                else:
-                    error_msg = result.get('error', 'Processing failed') if result else 'Unknown processing error'
-                    db_manager.update_document(doc_id, status='failed', error_message=error_msg)
                     
             except Exception as e:
                 logger.error(f"Processing error for doc {doc_id}: {e}")
@@ -622,14 +608,12 @@ def reprocess_document(doc_id: int):
         if not doc_processor:
             return jsonify({'error': 'Document processor not available'}), 500
         
-        # Update status to processing
-        db_manager.update_document(doc_id, status='processing')
-        
         try:
-            result = doc_processor.process_document_by_id(doc_id)
+            # process_document_by_id records the completed/failed status itself
+            # Reprocessing means running OCR again, not reusing a duplicate's results
+            result = doc_processor.process_document_by_id(doc_id, use_cache=False, doc=doc)
             
             if result and result.get('success', False):
-                db_manager.update_document(doc_id, status='completed')
                 return jsonify({
                     'success': True,
                     'message': 'Document reprocessed successfully',
@@ -637,7 +621,6 @@ def reprocess_document(doc_id: int):
                 })
             else:
                 error_msg = result.get('error', 'Processing failed') if result else 'Unknown processing error'
-                db_manager.update_document(doc_id, status='failed', error_message=error_msg)
                 return jsonify({
                     'success': False,
                     'error': error_msg
@@ -90,18 +90,9 @@ def create_api_blueprint(config, db_manager, doc_processor):
             if auto_process and doc_processor:
                 try:
                     logger.info(f"Starting automatic processing for document ID {doc_id}")
-                    # Update status to processing
-                    db_manager.update_document(doc_id, status='processing')
-                    
+                    # process_document_by_id records the completed/failed status itself
                     result = doc_processor.process_document_by_id(doc_id)
                     logger.info(f"Processing result for doc {doc_id}: {result}")
-                    
-                    # Update status based on result
-                    if result and result.get('success', False):
-                        db_manager.update_document(doc_id, status='completed')
-                    else:
-                        error_msg = result.get('error', 'Processing failed') if result else 'Unknown processing error'
-                        db_manager.update_document(doc_id, status='failed', error_message=error_msg)
                         
                 except Exception as e:
                     logger.error(f"Processing error for doc {doc_id}: {e}")
@@ -204,14 +195,12 @@ def create_api_blueprint(config, db_manager, doc_processor):
             if not doc_processor:
                 return jsonify({'error': 'Document processor not available'}), 500
             
-            # Update status to processing
-            db_manager.update_document(doc_id, status='processing')
-            
             try:
-                result = doc_processor.process_document_by_id(doc_id)
+                # process_document_by_id records the completed/failed status itself
+                # Reprocessing means running OCR again, not reusing a duplicate's results
+                result = doc_processor.process_document_by_id(doc_id, use_cache=False, doc=doc)
                 
                 if result and result.get('success', False):
-                    db_manager.update_document(doc_id, status='completed')
                     return jsonify({
                         'success': True,
                         'message': 'Document reprocessed successfully',
@@ -219,7 +208,6 @@ def create_api_blueprint(config, db_manager, doc_processor):
                     })
                 else:
                     error_msg = result.get('error', 'Processing failed') if result else 'Unknown processing error'
-                    db_manager.update_document(doc_id, status='failed', error_message=error_msg)
                     return jsonify({
                         'success': False,
                         'error': error_msg
@@ -13,18 +13,14 @@ def allowed_file(filename: str, config) -> bool:
         return False
     
     ext = filename.rsplit('.', 1)[1].lower()
-    allowed_extensions_str = config.get('processing', 'allowed_extensions', fallback='pdf,jpg,jpeg,png')
-    allowed_extensions = [e.strip() for e in allowed_extensions_str.split(',')]
-    return ext in allowed_extensions
+    return ext in config.get_set('processing', 'allowed_extensions', 'pdf,jpg,jpeg,png')
 
 def get_file_hash(filepath: str) -> str:
     """Calculate SHA-256 hash of file content"""
     try:
-        hash_sha256 = hashlib.sha256()
+        # file_digest reads in large blocks with the GIL released
         with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            return hashlib.file_digest(f, "sha256").hexdigest()
     except Exception as e:
         logger.error(f"Error calculating file hash: {e}")
         return ""
@@ -11,6 +11,16 @@ from .utils import parse_extracted_data, get_dashboard_stats # Ensure .utils is
 
 logger = logging.getLogger(__name__)
 
+def _paperless_session(api_token: str) -> requests.Session:
+    """HTTP session for the Paperless-ngx API, reusing one connection across calls"""
+    session = requests.Session()
+    session.headers['Authorization'] = f'Token {api_token}'
+    # It's highly recommended to set verify=True and provide a CA bundle
+    # or ensure your Paperless-ngx has a valid certificate in production.
+    # For local development, verify=False might be used.
+    session.verify = False
+    return session
+
 def create_web_blueprint(config, db_manager, doc_processor):
     """Create and configure the web routes blueprint"""
     web = Blueprint('web', __name__)
@@ -213,16 +223,15 @@ def create_web_blueprint(config, db_manager, doc_processor):
             logger.error("Paperless-ngx API Token not configured.")
             return redirect(url_for('web.paperless_ngx_documents'))
 
-        headers = {
-            'Authorization': f'Token {PAPERLESS_NGX_API_TOKEN}',
-        }
+        # One keep-alive connection for every API call this page makes
+        session = _paperless_session(PAPERLESS_NGX_API_TOKEN)
 
         try:
             # Fetch document details including OCR content
             api_url = f"{api_base_url}/documents/{doc_id}/"
             logger.info(f"Fetching Paperless-ngx document details from: {api_url}")
 
-            response = requests.get(api_url, headers=headers, verify=False)
+            response = session.get(api_url)
             response.raise_for_status()
             doc_data = response.json()
 
@@ -248,7 +257,7 @@ def create_web_blueprint(config, db_manager, doc_processor):
             if document['correspondent']:
                 try:
                     corr_url = f"{api_base_url}/correspondents/{document['correspondent']}/"
-                    corr_response = requests.get(corr_url, headers=headers, verify=False)
+                    corr_response = session.get(corr_url)
                     corr_response.raise_for_status()
                     correspondent_name = corr_response.json().get('name', 'N/A')
                 except requests.exceptions.RequestException as e:
@@ -258,22 +267,26 @@ def create_web_blueprint(config, db_manager, doc_processor):
             if document['document_type']:
                 try:
                     type_url = f"{api_base_url}/document_types/{document['document_type']}/"
-                    type_response = requests.get(type_url, headers=headers, verify=False)
+                    type_response = session.get(type_url)
                     type_response.raise_for_status()
                     document_type_name = type_response.json().get('name', 'N/A')
                 except requests.exceptions.RequestException as e:
                     logger.warning(f"Could not fetch document type name: {e}")
 
-            # Get tag names
-            for tag_id in document['tags']:
+            # Get tag names, all in one request
+            if document['tags']:
+                tags_map = {}
                 try:
-                    tag_url = f"{api_base_url}/tags/{tag_id}/"
-                    tag_response = requests.get(tag_url, headers=headers, verify=False)
+                    tag_response = session.get(f"{api_base_url}/tags/", params={
+                        'id__in': ','.join(str(tag_id) for tag_id in document['tags']),
+                        'page_size': len(document['tags']),
+                    })
                     tag_response.raise_for_status()
-                    tag_names.append(tag_response.json().get('name', f'Tag {tag_id}'))
+                    for t in tag_response.json().get('results', []):
+                        tags_map[t['id']] = t['name']
                 except requests.exceptions.RequestException as e:
-                    logger.warning(f"Could not fetch tag name for ID {tag_id}: {e}")
-                    tag_names.append(f'Tag {tag_id}')
+                    logger.warning(f"Could not fetch tag names: {e}")
+                tag_names = [tags_map.get(tag_id, f'Tag {tag_id}') for tag_id in document['tags']]
 
             # Update document with resolved names
             document['correspondent_name'] = correspondent_name
@@ -303,6 +316,9 @@ def create_web_blueprint(config, db_manager, doc_processor):
             flash(f"An unexpected error occurred: {e}", "error")
             logger.exception(f"Unexpected error fetching OCR content for document {doc_id}")
             return redirect(url_for('web.paperless_ngx_documents'))
+        
+        finally:
+            session.close()
     
     # --- NEW ROUTE FOR PAPERLESS-NGX DOCUMENTS ---
     @web.route('/paperless-ngx-documents')
@@ -360,9 +376,8 @@ def create_web_blueprint(config, db_manager, doc_processor):
                                    YOUR_PAPERLESS_NGX_URL=clean_base_url,
                                    YOUR_PAPERLESS_NGX_BASE_URL=clean_base_url)
 
-        headers = {
-            'Authorization': f'Token {PAPERLESS_NGX_API_TOKEN}',
-        }
+        # One keep-alive connection for every API call this page makes
+        session = _paperless_session(PAPERLESS_NGX_API_TOKEN)
 
         params = {
             'page': current_page,
@@ -376,10 +391,7 @@ def create_web_blueprint(config, db_manager, doc_processor):
             api_url = f"{api_base_url}/documents/"
             logger.info(f"Fetching Paperless-ngx documents from: {api_url} with params: {params}")
 
-            # It's highly recommended to set verify=True and provide a CA bundle
-            # or ensure your Paperless-ngx has a valid certificate in production.
-            # For local development, verify=False might be used.
-            response = requests.get(api_url, headers=headers, params=params, verify=False)
+            response = session.get(api_url, params=params)
             response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
             data = response.json()
 
@@ -391,7 +403,7 @@ def create_web_blueprint(config, db_manager, doc_processor):
 
             # Fetch all correspondents
             try:
-                corr_res = requests.get(f"{api_base_url}/correspondents/?page_size=max", headers=headers, verify=False)
+                corr_res = session.get(f"{api_base_url}/correspondents/?page_size=max")
                 corr_res.raise_for_status()
                 for c in corr_res.json().get('results', []):
                     correspondents_map[c['id']] = c['name']
@@ -400,7 +412,7 @@ def create_web_blueprint(config, db_manager, doc_processor):
 
             # Fetch all document types
             try:
-                type_res = requests.get(f"{api_base_url}/document_types/?page_size=max", headers=headers, verify=False)
+                type_res = session.get(f"{api_base_url}/document_types/?page_size=max")
                 type_res.raise_for_status()
                 for t in type_res.json().get('results', []):
                     doc_types_map[t['id']] = t['name']
@@ -409,7 +421,7 @@ def create_web_blueprint(config, db_manager, doc_processor):
 
             # Fetch all tags
             try:
-                tags_res = requests.get(f"{api_base_url}/tags/?page_size=max", headers=headers, verify=False)
+                tags_res = session.get(f"{api_base_url}/tags/?page_size=max")
                 tags_res.raise_for_status()
                 for t in tags_res.json().get('results', []):
                     tags_map[t['id']] = t['name']
@@ -455,6 +467,8 @@ def create_web_blueprint(config, db_manager, doc_processor):
         except Exception as e:
             flash(f"An unexpected error occurred while fetching Paperless-ngx documents: {e}", "error")
             logger.exception("An unexpected error occurred in paperless_ngx_documents route.") # Use exception for full traceback
+        finally:
+            session.close()
 
         return render_template(
             'paperless_ngx_documents.html',